@@ -0,0 +1,82 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.db import get_async_db
+from database.replicas import get_async_read_db
+from dependencies.auth import get_current_user_required, get_session_claims
+from schemas.activity import ActivityQuery
+from schemas.responses import ActivityPage, HealthStatus, SignInResponse, UserProfile
+from schemas.user import (
+    UserChangePassword,
+    UserCreate,
+    UserProfileView,
+    UserSessionUpdate,
+    UserSignIn,
+    UserUpdate,
+)
+from services import async_service
+from services.serialization import render
+
+# Async variants of the user and activity routes, mounted instead of the sync
+# ones when DB_ASYNC is enabled. Concurrency is then bounded by the async
+# connection pool rather than by the threadpool size.
+router = APIRouter()
+
+
+@router.get("/health", response_model=HealthStatus)
+async def health(current_user: dict = Depends(get_current_user_required), db: AsyncSession = Depends(get_async_read_db)):
+    return render(await async_service.health_check(db))
+
+
+@router.post("/signin", response_model=SignInResponse, response_model_exclude_unset=True)
+async def user_signin(payload: UserSignIn, current_user: dict = Depends(get_current_user_required), db: AsyncSession = Depends(get_async_db)):
+    return render(await async_service.signin_user(payload, db))
+
+
+@router.post("/signup", response_model=UserProfile)
+async def user_signup(payload: UserCreate, current_user: dict = Depends(get_current_user_required), db: AsyncSession = Depends(get_async_db)):
+    return render(await async_service.signup_user(payload, db))
+
+
+@router.post("/update", response_model=UserProfile)
+async def user_update(payload: UserUpdate, current_user: dict = Depends(get_current_user_required), db: AsyncSession = Depends(get_async_db)):
+    return render(await async_service.update_user(payload, db))
+
+
+@router.post("/change-password", response_model=UserProfile)
+async def user_change_password(payload: UserChangePassword, current_user: dict = Depends(get_current_user_required), db: AsyncSession = Depends(get_async_db)):
+    return render(await async_service.change_password(payload, db))
+
+
+@router.post("/profile", response_model=UserProfile)
+async def user_profile(payload: UserProfileView, db: AsyncSession = Depends(get_async_db)):
+    return render(await async_service.view_profile(payload, db))
+
+
+@router.get("/session/profile", response_model=UserProfile)
+async def session_profile(claims: dict = Depends(get_session_claims), db: AsyncSession = Depends(get_async_db)):
+    return render(await async_service.view_profile_by_session(claims, db))
+
+
+@router.post("/session/update", response_model=UserProfile)
+async def session_update(payload: UserSessionUpdate, claims: dict = Depends(get_session_claims), db: AsyncSession = Depends(get_async_db)):
+    return render(await async_service.update_user_by_session(payload, claims, db))
+
+
+@router.get("/user/activities", response_model=ActivityPage)
+async def get_my_activities(filters: ActivityQuery = Depends(), current_user: dict = Depends(get_current_user_required), db: AsyncSession = Depends(get_async_read_db)):
+    """Get the current user's activities, newest first."""
+    return render(await async_service.query_activities(db, filters, user_id=current_user["user_id"]))
+
+
+@router.get("/admin/activities", response_model=ActivityPage)
+async def get_all_activities_endpoint(
+    user_id: Optional[str] = None,
+    filters: ActivityQuery = Depends(),
+    current_user: dict = Depends(get_current_user_required),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    """Get user activities, filtered and keyset-paginated (admin endpoint)."""
+    return render(await async_service.query_activities(db, filters, user_id=user_id))
@@ -1,35 +1,125 @@
-from fastapi import Depends, FastAPI
+import io
+import logging
+import os
+import tempfile
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import List, Optional
+
+from anyio import to_thread
+from fastapi import APIRouter, Depends, FastAPI, Query, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from sqlalchemy.orm import Session
 
-from database.db import SessionLocal
-from dependencies.auth import get_current_user_optional, get_current_user_required
+from database.db import DB_ASYNC, configure, dispose_engines, get_db, pool_stats, warm_async_pool, warm_pool
+from database.query_stats import on_query
+from database.replicas import get_read_db, replica_router
+from dependencies.auth import get_current_user_required, get_session_claims
+from middleware.jwks import JWKSError, jwks_cache
+from middleware.metrics import METRICS_ENABLED, MetricsMiddleware, record_phase, register_stats, render_metrics
+from middleware.query_stats import QueryStatsMiddleware
+from middleware.token_cache import token_cache
+from schemas.activity import ActivityFilters, ActivityQuery
+from schemas.responses import (
+    ActivityPage,
+    AdminUserPage,
+    AnalyticsResponse,
+    HealthStatus,
+    SignInResponse,
+    UserProfile,
+)
 from schemas.user import (
     UserChangePassword,
     UserCreate,
     UserProfileView,
+    UserSessionUpdate,
     UserSignIn,
     UserUpdate,
 )
-from services.activity_service import get_user_activities, get_all_activities
+from services.analytics_service import query_analytics
+from services.admin_service import iter_users_ndjson, list_users
+from services.activity_service import query_activities
+from services.activity_writer import activity_writer
+from services.export_service import export_filename, export_media_type, iter_activity_export
+from services.import_service import import_users
+from services.partition_service import ACTIVITY_PARTITION_MAINTENANCE, partition_maintainer
+from services.password_hasher import password_hasher
+from services.serialization import FastJSONResponse, render
 from services.service import (
     change_password,
     health_check,
     signin_user,
     signup_user,
     update_user,
+    update_user_by_session,
     view_profile,
+    view_profile_by_session,
 )
+from services.user_cache import user_cache
+
+
+logger = logging.getLogger(__name__)
 
 
 class APISettings:
     def __init__(self) -> None:
         self.app_name: str = "User Log API"
         self.app_version: str = "1.0.0"
+        # Open DB connections, fetch signing keys and start hashing workers
+        # before the first request is accepted.
+        self.warmup: bool = os.getenv("APP_WARMUP", "true").lower() in ("1", "true", "yes")
+        # Threads running sync routes; defaults to anyio's 40, or more when the
+        # password hasher admits enough work to tie up half of them.
+        self.request_threads: int = int(os.getenv("APP_REQUEST_THREADS", str(max(40, 2 * password_hasher.capacity))))
 
 
 api_settings = APISettings()
 
 
+async def warm_up() -> None:
+    """Pay connection, key fetch and worker start-up costs before serving.
+
+    Failures are logged rather than raised: every step is retried lazily by
+    the first request that needs it.
+    """
+    try:
+        await to_thread.run_sync(warm_pool)
+        if DB_ASYNC:
+            await warm_async_pool()
+    except Exception as exc:
+        logger.warning("Database pool warm-up failed: %s", exc)
+    try:
+        await jwks_cache.refresh()
+    except JWKSError as exc:
+        logger.warning("Signing keys could not be prefetched: %s", exc)
+    await to_thread.run_sync(password_hasher.warm_up)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Raise on a bad DB or threadpool configuration, so the server refuses to start.
+    configure()
+    password_hasher.check_threadpool(api_settings.request_threads)
+    to_thread.current_default_thread_limiter().total_tokens = api_settings.request_threads
+    activity_writer.start()
+    replica_router.start()
+    if ACTIVITY_PARTITION_MAINTENANCE:
+        partition_maintainer.start()
+    if api_settings.warmup:
+        await warm_up()
+    # In-flight requests are drained by the server (see APP_GRACEFUL_TIMEOUT
+    # in main.py) before the shutdown below runs.
+    yield
+    await to_thread.run_sync(partition_maintainer.stop)
+    await to_thread.run_sync(replica_router.stop)
+    await jwks_cache.aclose()
+    # Flush every queued activity record before the worker exits.
+    await to_thread.run_sync(activity_writer.stop)
+    await to_thread.run_sync(password_hasher.shutdown)
+    await replica_router.dispose()
+    await dispose_engines()
+
+
 app = FastAPI(
     title=api_settings.app_name,
     description="Backend API for user log and account management",
@@ -37,79 +127,201 @@ app = FastAPI(
     docs_url="/api/docs",
     redoc_url="/api/redoc",
     openapi_url="/api/openapi.json",
+    default_response_class=FastJSONResponse,
+    lifespan=lifespan,
 )
 
+if METRICS_ENABLED:
+    app.add_middleware(QueryStatsMiddleware)
+    app.add_middleware(MetricsMiddleware)
+    on_query(lambda seconds: record_phase("db", seconds))
+    register_stats("db_pool", pool_stats)
+    register_stats("db_replicas", replica_router.stats)
+    register_stats("activity_writer", activity_writer.stats)
+    register_stats("partition_maintenance", partition_maintainer.stats)
+    register_stats("jwks", jwks_cache.stats)
+    register_stats("token_cache", token_cache.stats)
+    register_stats("password_hasher", password_hasher.stats)
+    register_stats("user_cache", user_cache.stats)
 
-def get_db() -> Session:
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# User and activity routes backed by the sync engine; replaced by
+# api.async_crud.router when DB_ASYNC is enabled.
+sync_router = APIRouter()
 
 
-@app.get("/health")
-def health(current_user: dict = Depends(get_current_user_required), db: Session = Depends(get_db)):
-    return health_check(db)
+@sync_router.get("/health", response_model=HealthStatus)
+def health(current_user: dict = Depends(get_current_user_required), db: Session = Depends(get_read_db)):
+    return render(health_check(db))
 
 
-@app.post("/signin")
+@sync_router.post("/signin", response_model=SignInResponse, response_model_exclude_unset=True)
 def user_signin(payload: UserSignIn, current_user: dict = Depends(get_current_user_required), db: Session = Depends(get_db)):
-    return signin_user(payload, db)
+    return render(signin_user(payload, db))
 
 
-@app.post("/signup")
+@sync_router.post("/signup", response_model=UserProfile)
 def user_signup(payload: UserCreate, current_user: dict = Depends(get_current_user_required), db: Session = Depends(get_db)):
-    return signup_user(payload, db)
+    return render(signup_user(payload, db))
 
 
-@app.post("/update")
+@sync_router.post("/update", response_model=UserProfile)
 def user_update(payload: UserUpdate, current_user: dict = Depends(get_current_user_required), db: Session = Depends(get_db)):
-    return update_user(payload, db)
+    return render(update_user(payload, db))
 
 
-@app.post("/change-password")
+@sync_router.post("/change-password", response_model=UserProfile)
 def user_change_password(payload: UserChangePassword, current_user: dict = Depends(get_current_user_required), db: Session = Depends(get_db)):
-    return change_password(payload, db)
+    return render(change_password(payload, db))
 
 
-@app.post("/profile")
+@sync_router.post("/profile", response_model=UserProfile)
 def user_profile(payload: UserProfileView, db: Session = Depends(get_db)):
-    return view_profile(payload, db)
+    return render(view_profile(payload, db))
+
+
+@sync_router.get("/session/profile", response_model=UserProfile)
+def session_profile(claims: dict = Depends(get_session_claims), db: Session = Depends(get_db)):
+    return render(view_profile_by_session(claims, db))
+
+
+@sync_router.post("/session/update", response_model=UserProfile)
+def session_update(payload: UserSessionUpdate, claims: dict = Depends(get_session_claims), db: Session = Depends(get_db)):
+    return render(update_user_by_session(payload, claims, db))
+
+
+@sync_router.get("/user/activities", response_model=ActivityPage)
+def get_my_activities(filters: ActivityQuery = Depends(), current_user: dict = Depends(get_current_user_required), db: Session = Depends(get_read_db)):
+    """Get the current user's activities, newest first."""
+    return render(query_activities(db, filters, user_id=current_user["user_id"]))
 
 
 # Admin endpoints for monitoring
-@app.get("/admin/activities")
-def get_all_activities_endpoint(current_user: dict = Depends(get_current_user_required), db: Session = Depends(get_db)):
-    """Get all user activities (admin endpoint)."""
-    activities = get_all_activities(db)
-    return {
-        "activities": activities,
-        "total": len(activities)
-    }
+@sync_router.get("/admin/activities", response_model=ActivityPage)
+def get_all_activities_endpoint(
+    user_id: Optional[str] = None,
+    filters: ActivityQuery = Depends(),
+    current_user: dict = Depends(get_current_user_required),
+    db: Session = Depends(get_read_db),
+):
+    """Get user activities, filtered and keyset-paginated (admin endpoint)."""
+    return render(query_activities(db, filters, user_id=user_id))
+
+
+@app.get("/admin/activities/export")
+def export_activities_endpoint(
+    user_id: Optional[str] = None,
+    filters: ActivityFilters = Depends(),
+    format: str = Query("ndjson", pattern="^(csv|ndjson)$"),
+    gzip: bool = False,
+    current_user: dict = Depends(get_current_user_required),
+):
+    """Stream every matching activity, oldest first, as CSV or NDJSON (admin endpoint).
 
+    `gzip=true` compresses the stream on the fly.
+    """
+    return StreamingResponse(
+        iter_activity_export(filters, user_id=user_id, fmt=format, compress=gzip),
+        media_type=export_media_type(format, gzip),
+        headers={"Content-Disposition": f'attachment; filename="{export_filename(format, gzip)}"'},
+    )
 
-@app.get("/admin/users")
-def get_all_users(current_user: dict = Depends(get_current_user_required), db: Session = Depends(get_db)):
-    """Get list of all registered users (admin endpoint)."""
-    from models.user import User
-    
-    users = db.query(User).all()
-    user_list = []
-    
-    for user in users:
-        user_list.append({
-            "id": str(user.id),
-            "name": user.name,
-            "email": user.email,
-            "phone_number": user.phone_number,
-            "date_of_birth": user.date_of_birth.isoformat() if user.date_of_birth else None,
-            "age": user.age,
-            "blood_group": user.blood_group,
-            "created_ts": user.created_ts.isoformat() if user.created_ts else None,
-        })
-    
+
+@app.get("/admin/activities/writer")
+def get_activity_writer_stats(current_user: dict = Depends(get_current_user_required)):
+    """Get activity-log queue depth and write counters (admin endpoint)."""
+    return activity_writer.stats()
+
+
+@app.get("/admin/analytics", response_model=AnalyticsResponse)
+def get_activity_analytics(
+    start: datetime,
+    end: datetime,
+    granularity: str = Query("hour", pattern="^(minute|hour|day)$"),
+    group_by: List[str] = Query([]),
+    action: Optional[str] = None,
+    status: Optional[str] = None,
+    current_user: dict = Depends(get_current_user_required),
+    db: Session = Depends(get_read_db),
+):
+    """Get activity counts per time bucket from the rollup tables (admin endpoint)."""
+    return render(query_analytics(db, granularity, start, end, group_by=group_by, action=action, status=status))
+
+
+@app.get("/admin/activities/partitions")
+def get_partition_stats(current_user: dict = Depends(get_current_user_required)):
+    """Get the last activity partition maintenance run (admin endpoint)."""
+    return partition_maintainer.stats()
+
+
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    """Request latency, phase timings and component counters for Prometheus."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/admin/db/pool")
+def get_pool_stats(current_user: dict = Depends(get_current_user_required)):
+    """Get connection pool occupancy, checkout wait times and replica lag (admin endpoint)."""
+    return {**pool_stats(), "replicas": replica_router.stats()}
+
+
+@app.get("/admin/auth/stats")
+def get_auth_stats(current_user: dict = Depends(get_current_user_required)):
+    """Get signing key, token, password hashing and user cache counters (admin endpoint)."""
     return {
-        "users": user_list,
-        "total": len(user_list)
+        "jwks": jwks_cache.stats(),
+        "tokens": token_cache.stats(),
+        "passwords": password_hasher.stats(),
+        "users": user_cache.stats(),
     }
+
+
+@app.get("/admin/users", response_model=AdminUserPage)
+def get_all_users(
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    current_user: dict = Depends(get_current_user_required),
+    db: Session = Depends(get_read_db),
+):
+    """Get registered users (admin endpoint).
+
+    Returns keyset-paginated pages ordered by id; pass `next_cursor` back as
+    `cursor` for the next page. `format=ndjson` streams every user instead.
+    """
+    if format == "ndjson":
+        return StreamingResponse(iter_users_ndjson(), media_type="application/x-ndjson")
+
+    return render(list_users(db, limit=limit, cursor=cursor, include_total=include_total))
+
+
+@app.post("/admin/users/import")
+async def import_users_endpoint(
+    request: Request,
+    format: str = Query("ndjson", pattern="^(csv|ndjson)$"),
+    current_user: dict = Depends(get_current_user_required),
+    db: Session = Depends(get_db),
+):
+    """Bulk-create users from a CSV or NDJSON request body (admin endpoint).
+
+    Returns import counts and a per-line error report.
+    """
+    # Spool the upload (to disk past 8 MiB) so the import reads it as a stream.
+    with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as upload:
+        async for chunk in request.stream():
+            upload.write(chunk)
+        upload.seek(0)
+        stream = io.TextIOWrapper(upload, encoding="utf-8-sig", newline="")
+        try:
+            return await to_thread.run_sync(import_users, db, stream, format)
+        finally:
+            stream.detach()
+
+
+if DB_ASYNC:
+    from api.async_crud import router as async_router
+
+    app.include_router(async_router)
+else:
+    app.include_router(sync_router)
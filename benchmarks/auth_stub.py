@@ -0,0 +1,120 @@
+"""Local stand-in for the Auth0 tenant: a generated RSA key, its JWKS served
+over HTTP and tokens minted with it.
+
+The API accepts the tokens once it is started with `stub.env()`, which points
+AUTH0_DOMAIN, AUTH0_API_AUDIENCE and AUTH0_JWKS_URL at the stub. `jwks_delay`
+holds every JWKS response back that many seconds, to stand in for a slow IdP.
+"""
+import base64
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwt
+
+JWKS_PATH = "/.well-known/jwks.json"
+
+
+def _b64_uint(value: int) -> str:
+    data = value.to_bytes((value.bit_length() + 7) // 8, "big")
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+class AuthStub:
+    """Serves a JWKS with one generated RS256 key and mints tokens signed by it."""
+
+    def __init__(self, domain: str = "bench.auth.local", audience: str = "bench-api", jwks_delay: float = 0.0) -> None:
+        self.domain = domain
+        self.audience = audience
+        self.jwks_delay = jwks_delay
+        self.kid = uuid.uuid4().hex
+
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        self._private_pem = key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        ).decode()
+        numbers = key.public_key().public_numbers()
+        self._jwks = json.dumps({
+            "keys": [{
+                "kty": "RSA",
+                "kid": self.kid,
+                "use": "sig",
+                "alg": "RS256",
+                "n": _b64_uint(numbers.n),
+                "e": _b64_uint(numbers.e),
+            }]
+        }).encode()
+
+        self.jwks_requests = 0
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def jwks_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}{JWKS_PATH}"
+
+    def start(self) -> "AuthStub":
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path != JWKS_PATH:
+                    self.send_error(404)
+                    return
+                stub.jwks_requests += 1
+                if stub.jwks_delay:
+                    time.sleep(stub.jwks_delay)
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(stub._jwks)))
+                self.end_headers()
+                self.wfile.write(stub._jwks)
+
+            def log_message(self, format, *args) -> None:
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, name="auth-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def env(self) -> Dict[str, str]:
+        """Environment variables that make the API trust this stub."""
+        return {
+            "AUTH0_DOMAIN": self.domain,
+            "AUTH0_API_AUDIENCE": self.audience,
+            "AUTH0_JWKS_URL": self.jwks_url,
+        }
+
+    def token(self, sub: str, email: Optional[str] = None, ttl: int = 3600) -> str:
+        now = int(time.time())
+        claims = {
+            "iss": f"https://{self.domain}/",
+            "aud": self.audience,
+            "sub": sub,
+            "iat": now,
+            "exp": now + ttl,
+        }
+        if email is not None:
+            claims["email"] = email
+        return jwt.encode(claims, self._private_pem, algorithm="RS256", headers={"kid": self.kid})
+
+    def __enter__(self) -> "AuthStub":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
@@ -0,0 +1,96 @@
+"""Check that token verification never blocks the event loop, even while the
+JWKS endpoint is slow.
+
+Starts the auth stub (benchmarks/auth_stub.py) with every JWKS response held
+back `--jwks-delay` seconds, then verifies a batch of tokens against a cold key
+cache while a timer ticks on the same loop:
+
+    python -m benchmarks.event_loop --jwks-delay 1 --tokens 20
+
+Exits non-zero when a tick fires more than `--max-stall-ms` late, when the
+verifications did not actually wait for the slow fetch, or when the key set was
+fetched more than once.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Dict, List
+
+from benchmarks.auth_stub import AuthStub
+
+TICK_SECONDS = 0.005
+
+
+async def _tick(stop: asyncio.Event, lateness: List[float]) -> None:
+    """Sleep in short steps and record how late each wake-up is."""
+    while not stop.is_set():
+        expected = time.perf_counter() + TICK_SECONDS
+        await asyncio.sleep(TICK_SECONDS)
+        lateness.append(max(time.perf_counter() - expected, 0.0))
+
+
+async def _verify_all(tokens: List[str]) -> Dict:
+    # Imported here: middleware.auth and middleware.jwks read the AUTH0_*
+    # variables at import time.
+    from middleware.auth import verify_token
+    from middleware.jwks import jwks_cache
+
+    stop = asyncio.Event()
+    lateness: List[float] = []
+    ticker = asyncio.create_task(_tick(stop, lateness))
+    # Let the ticker establish a baseline before the fetch starts.
+    await asyncio.sleep(TICK_SECONDS * 10)
+
+    started = time.perf_counter()
+    try:
+        results = await asyncio.gather(*(verify_token(token) for token in tokens), return_exceptions=True)
+    finally:
+        verified_in = time.perf_counter() - started
+        stop.set()
+        await ticker
+        await jwks_cache.aclose()
+
+    return {
+        "verified": sum(isinstance(result, dict) for result in results),
+        "errors": [str(result) for result in results if isinstance(result, Exception)][:3],
+        "verify_seconds": round(verified_in, 3),
+        "ticks": len(lateness),
+        "max_tick_late_ms": round(max(lateness, default=0.0) * 1000, 1),
+    }
+
+
+def check(jwks_delay: float, tokens: int, max_stall_ms: float) -> Dict:
+    with AuthStub(jwks_delay=jwks_delay) as stub:
+        os.environ.update(stub.env())
+        report = asyncio.run(_verify_all([stub.token(f"auth0|loop-{i}") for i in range(tokens)]))
+        report["jwks_requests"] = stub.jwks_requests
+
+    failures = []
+    if report["verified"] != tokens:
+        failures.append(f"{tokens - report['verified']} of {tokens} tokens failed to verify: {report['errors']}")
+    if report["verify_seconds"] < jwks_delay:
+        failures.append("verification finished before the JWKS delay; the slow fetch was not exercised")
+    if report["jwks_requests"] != 1:
+        failures.append(f"expected one JWKS fetch, made {report['jwks_requests']}")
+    if report["max_tick_late_ms"] > max_stall_ms:
+        failures.append(f"event loop stalled {report['max_tick_late_ms']} ms (budget {max_stall_ms} ms)")
+    return {"jwks_delay": jwks_delay, "tokens": tokens, "max_stall_ms": max_stall_ms, **report, "failures": failures}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jwks-delay", type=float, default=1.0)
+    parser.add_argument("--tokens", type=int, default=20)
+    parser.add_argument("--max-stall-ms", type=float, default=100.0)
+    args = parser.parse_args()
+
+    report = check(args.jwks_delay, args.tokens, args.max_stall_ms)
+    print(json.dumps(report, indent=2))
+    return 1 if report["failures"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""Profile the app's cold-start import time and check it against a budget.
+
+Each run imports the module in a fresh interpreter with `-X importtime`:
+
+    python -m benchmarks.import_time --runs 5 --budget-ms 1500
+
+Exits non-zero when the median is over budget. The slowest top-level imports
+of the median run are listed so a regression points at its cause.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_TIME_BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "1500"))
+
+
+def _import_once(module: str) -> List[Tuple[int, int, str]]:
+    """(self us, cumulative us, indented name) for every module imported."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(self_us), int(cumulative_us), name))
+    return rows
+
+
+def profile(module: str = "api.crud", runs: int = 5, budget_ms: float = IMPORT_TIME_BUDGET_MS, top: int = 10) -> Dict:
+    profiles = []
+    for _ in range(runs):
+        rows = _import_once(module)
+        total_us = next(cumulative for _, cumulative, name in reversed(rows) if name.strip() == module)
+        profiles.append((total_us, rows))
+    profiles.sort(key=lambda item: item[0])
+    totals = [total_us / 1000 for total_us, _ in profiles]
+    median_ms = statistics.median(totals)
+
+    # Modules imported directly by the target (one level of indentation).
+    _, rows = profiles[len(profiles) // 2]
+    direct = [(cumulative, self_us, name.strip()) for self_us, cumulative, name in rows if name.startswith("   ") and not name.startswith("    ")]
+    slowest = sorted(direct, reverse=True)[:top]
+    return {
+        "module": module,
+        "runs": runs,
+        "median_ms": round(median_ms, 1),
+        "min_ms": round(totals[0], 1),
+        "max_ms": round(totals[-1], 1),
+        "budget_ms": budget_ms,
+        "within_budget": median_ms <= budget_ms,
+        "slowest": [
+            {"module": name, "cumulative_ms": round(cumulative / 1000, 1), "self_ms": round(self_us / 1000, 1)}
+            for cumulative, self_us, name in slowest
+        ],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="api.crud")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=IMPORT_TIME_BUDGET_MS)
+    args = parser.parse_args()
+
+    report = profile(args.module, args.runs, args.budget_ms)
+    print(json.dumps(report, indent=2))
+    sys.exit(0 if report["within_budget"] else 1)
+
+
+if __name__ == "__main__":
+    main()
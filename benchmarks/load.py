@@ -0,0 +1,381 @@
+"""Load test the API end to end against a local auth stub and PostgreSQL.
+
+Starts the auth stub (benchmarks/auth_stub.py) and a throwaway database
+(benchmarks/postgres.py), seeds users, runs the app under uvicorn and drives
+a workload with concurrent virtual users. Throughput and p50/p95/p99 latency
+per endpoint are written as JSON, together with a cold-start import profile
+(benchmarks/import_time.py). `compare` diffs two result files and exits
+non-zero on a regression or an import time over budget:
+
+    python -m benchmarks.load run --workload mixed --duration 30 -o new.json
+    python -m benchmarks.load compare base.json new.json --tolerance 0.1
+
+Settings under test (FAST_JSON, DB_ASYNC, BCRYPT_ROUNDS, ...) are read from
+the environment by the server as usual and recorded in the results.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+from datetime import date, datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from benchmarks import import_time
+from benchmarks.auth_stub import AuthStub
+from benchmarks.postgres import ephemeral_postgres
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BENCH_PASSWORD = "bench-password"
+
+# Operation -> weight. Every operation is recorded under its route.
+WORKLOADS: Dict[str, Dict[str, int]] = {
+    "signin_storm": {"signin": 1},
+    "profile_polling": {"session_profile": 1},
+    "admin_listing": {"admin_users": 1},
+    "mixed": {"session_profile": 60, "user_activities": 15, "signin": 10, "admin_users": 10, "health": 5},
+}
+
+# Recorded with the results so runs under different settings are not compared blindly.
+SERVER_SETTINGS = (
+    "BCRYPT_ROUNDS",
+    "DB_ASYNC",
+    "DB_POOL_SIZE",
+    "DB_MAX_OVERFLOW",
+    "FAST_JSON",
+    "PASSWORD_WORKERS",
+    "USER_CACHE_BACKEND",
+    "METRICS_ENABLED",
+)
+
+
+class VirtualUser:
+    """One seeded user driving requests with its own token and session."""
+
+    def __init__(self, index: int, users: int, stub: AuthStub, seed: int) -> None:
+        self.number = index % users
+        self.email = f"bench{self.number}@example.com"
+        self.headers = {"Authorization": f"Bearer {stub.token(f'auth0|bench{self.number}', self.email)}"}
+        self.session_token: Optional[str] = None
+        self.cursor: Optional[str] = None
+        self.random = random.Random(seed + index)
+
+    async def signin(self, http: httpx.AsyncClient) -> httpx.Response:
+        return await http.post(
+            "/signin",
+            json={"email": self.email, "password": BENCH_PASSWORD, "issue_token": True},
+            headers=self.headers,
+        )
+
+    async def session_profile(self, http: httpx.AsyncClient) -> httpx.Response:
+        return await http.get("/session/profile", headers={"X-Session-Token": self.session_token})
+
+    async def admin_users(self, http: httpx.AsyncClient) -> httpx.Response:
+        # Walks the whole listing page by page, then starts over.
+        params = {"limit": 100}
+        if self.cursor:
+            params["cursor"] = self.cursor
+        response = await http.get("/admin/users", params=params, headers=self.headers)
+        self.cursor = response.json().get("next_cursor") if response.status_code == 200 else None
+        return response
+
+    async def user_activities(self, http: httpx.AsyncClient) -> httpx.Response:
+        return await http.get("/user/activities", params={"limit": 50}, headers=self.headers)
+
+    async def health(self, http: httpx.AsyncClient) -> httpx.Response:
+        return await http.get("/health", headers=self.headers)
+
+
+ROUTES = {
+    "signin": "POST /signin",
+    "session_profile": "GET /session/profile",
+    "admin_users": "GET /admin/users",
+    "user_activities": "GET /user/activities",
+    "health": "GET /health",
+}
+
+
+async def _drive(
+    http: httpx.AsyncClient,
+    user: VirtualUser,
+    mix: Dict[str, int],
+    measure_from: float,
+    until: float,
+    samples: List[Tuple[str, float, bool]],
+) -> None:
+    operations, weights = list(mix), list(mix.values())
+    while True:
+        started = time.perf_counter()
+        if started >= until:
+            return
+        operation = user.random.choices(operations, weights)[0]
+        try:
+            response = await getattr(user, operation)(http)
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            ok = False
+        if started >= measure_from:
+            samples.append((ROUTES[operation], time.perf_counter() - started, ok))
+
+
+async def run_workload(
+    base_url: str,
+    stub: AuthStub,
+    workload: str,
+    concurrency: int,
+    users: int,
+    duration: float,
+    warmup: float,
+    seed: int = 1,
+    transport: Optional[httpx.AsyncBaseTransport] = None,
+) -> Tuple[List[Tuple[str, float, bool]], float]:
+    """Run `workload` and return the (route, seconds, ok) samples and the measured span."""
+    mix = WORKLOADS[workload]
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60, transport=transport) as http:
+        vus = [VirtualUser(index, users, stub, seed) for index in range(concurrency)]
+        if "session_profile" in mix:
+            # Session tokens come from one signin each, outside the measurement.
+            for user in vus:
+                response = await user.signin(http)
+                response.raise_for_status()
+                user.session_token = response.json()["session_token"]
+
+        samples: List[Tuple[str, float, bool]] = []
+        measure_from = time.perf_counter() + warmup
+        until = measure_from + duration
+        await asyncio.gather(*(_drive(http, user, mix, measure_from, until, samples) for user in vus))
+        return samples, duration
+
+
+def _percentile(ordered: List[float], fraction: float) -> float:
+    # Nearest rank
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def summarize(samples: List[Tuple[str, float, bool]], seconds: float) -> Dict:
+    def stats(latencies: List[float], errors: int) -> Dict:
+        ordered = sorted(latencies)
+        if not ordered:
+            return {"requests": 0, "errors": errors}
+        return {
+            "requests": len(ordered),
+            "errors": errors,
+            "throughput": round(len(ordered) / seconds, 2),
+            "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3),
+            "p50_ms": round(_percentile(ordered, 0.50) * 1000, 3),
+            "p95_ms": round(_percentile(ordered, 0.95) * 1000, 3),
+            "p99_ms": round(_percentile(ordered, 0.99) * 1000, 3),
+            "max_ms": round(ordered[-1] * 1000, 3),
+        }
+
+    by_route: Dict[str, Tuple[List[float], List[int]]] = {}
+    for route, latency, ok in samples:
+        latencies, errors = by_route.setdefault(route, ([], [0]))
+        latencies.append(latency)
+        errors[0] += not ok
+    return {
+        "total": stats([latency for _, latency, _ in samples], sum(not ok for _, _, ok in samples)),
+        "endpoints": {route: stats(latencies, errors[0]) for route, (latencies, errors) in sorted(by_route.items())},
+    }
+
+
+def _prepare_database(users: int) -> None:
+    """Create the schema and seed `users` users sharing one password."""
+    # Imported here: database/db.py reads the DB_* variables at import time.
+    import bcrypt
+
+    from database.db import Base, SessionLocal, engine
+    from models import activity, user  # noqa: F401  (register the tables)
+    from services.import_service import import_users
+    from services.partition_service import ensure_partitions
+
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        ensure_partitions(conn, date.today())
+
+    rounds = int(os.getenv("BCRYPT_ROUNDS", "12"))
+    password_hash = bcrypt.hashpw(BENCH_PASSWORD.encode(), bcrypt.gensalt(rounds)).decode()
+    records = (
+        json.dumps({"name": f"Bench User {i}", "email": f"bench{i}@example.com", "password_hash": password_hash})
+        for i in range(users)
+    )
+    with SessionLocal() as db:
+        report = import_users(db, records, "ndjson")
+    engine.dispose()
+    if report["failed"]:
+        raise RuntimeError(f"seeding failed: {report['errors'][:3]}")
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_ready(base_url: str, server: subprocess.Popen, timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"server exited with code {server.returncode}")
+        try:
+            httpx.get(f"{base_url}/metrics", timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError("server did not start in time")
+
+
+def _commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, check=True, capture_output=True, text=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_command(args: argparse.Namespace) -> int:
+    with AuthStub() as stub, ephemeral_postgres() as db_env:
+        env = {
+            "SESSION_TOKEN_SECRET": "bench",
+            **os.environ,
+            **db_env,
+            **stub.env(),
+            # Every read must hit the fixture, not a configured replica.
+            "DB_REPLICA_URLS": "",
+        }
+        os.environ.update(env)
+        _prepare_database(args.users)
+
+        port = _free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        server = subprocess.Popen(
+            [
+                sys.executable, "-m", "uvicorn", "api.crud:app",
+                "--host", "127.0.0.1", "--port", str(port),
+                "--workers", str(args.workers), "--log-level", "warning",
+            ],
+            cwd=REPO_ROOT,
+            env=env,
+        )
+        try:
+            _wait_ready(base_url, server)
+            samples, seconds = asyncio.run(run_workload(
+                base_url, stub, args.workload, args.concurrency, args.users, args.duration, args.warmup, args.seed
+            ))
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+    results = {
+        "workload": args.workload,
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "duration": args.duration,
+        "warmup": args.warmup,
+        "concurrency": args.concurrency,
+        "workers": args.workers,
+        "users": args.users,
+        "environment": {
+            "commit": _commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "settings": {name: os.environ[name] for name in SERVER_SETTINGS if name in os.environ},
+        "import_time": import_time.profile(runs=args.import_runs),
+        **summarize(samples, seconds),
+    }
+    with open(args.output or f"bench-{args.workload}.json", "w") as handle:
+        json.dump(results, handle, indent=2)
+    print(json.dumps({key: results[key] for key in ("import_time", "total", "endpoints")}, indent=2))
+    return 0 if results["import_time"]["within_budget"] else 1
+
+
+def compare_results(base: Dict, new: Dict, tolerance: float) -> Tuple[List[Dict], bool]:
+    """Per-endpoint throughput and p95/p99 changes; regressed if any is worse than `tolerance`."""
+    rows, regressed = [], False
+    for route in sorted(set(base["endpoints"]) & set(new["endpoints"])):
+        before, after = base["endpoints"][route], new["endpoints"][route]
+        if not before.get("requests") or not after.get("requests"):
+            continue
+        row = {"endpoint": route}
+        for key, higher_is_better in (("throughput", True), ("p95_ms", False), ("p99_ms", False)):
+            change = (after[key] - before[key]) / before[key] if before[key] else 0.0
+            row[key] = {"base": before[key], "new": after[key], "change": round(change, 3)}
+            if (change < -tolerance) if higher_is_better else (change > tolerance):
+                row["regression"] = True
+                regressed = True
+        rows.append(row)
+    return rows, regressed
+
+
+def compare_command(args: argparse.Namespace) -> int:
+    with open(args.base) as handle:
+        base = json.load(handle)
+    with open(args.new) as handle:
+        new = json.load(handle)
+    if base.get("settings") != new.get("settings") or base.get("workload") != new.get("workload"):
+        print("warning: runs used different workloads or settings", file=sys.stderr)
+
+    rows, regressed = compare_results(base, new, args.tolerance)
+    if "import_time" in base and "import_time" in new:
+        before, after = base["import_time"]["median_ms"], new["import_time"]["median_ms"]
+        over_budget = not new["import_time"]["within_budget"]
+        print(
+            f"{'import ' + new['import_time']['module']:<24}  median_ms {before} -> {after} "
+            f"({(after - before) / before:+.1%})" + ("  OVER BUDGET" if over_budget else "")
+        )
+        regressed = regressed or over_budget
+    for row in rows:
+        print(
+            f"{row['endpoint']:<24}"
+            + "".join(
+                f"  {key} {row[key]['base']} -> {row[key]['new']} ({row[key]['change']:+.1%})"
+                for key in ("throughput", "p95_ms", "p99_ms")
+            )
+            + ("  REGRESSION" if row.get("regression") else "")
+        )
+    return 1 if regressed else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    runner = commands.add_parser("run", help="Run a workload and write its results as JSON")
+    runner.add_argument("--workload", choices=sorted(WORKLOADS), default="mixed")
+    runner.add_argument("--duration", type=float, default=30, help="Measured seconds")
+    runner.add_argument("--warmup", type=float, default=5, help="Unmeasured seconds before measuring")
+    runner.add_argument("--concurrency", type=int, default=32, help="Virtual users")
+    runner.add_argument("--users", type=int, default=1000, help="Seeded users")
+    runner.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    runner.add_argument("--seed", type=int, default=1)
+    runner.add_argument("--import-runs", type=int, default=5, help="Cold imports to profile")
+    runner.add_argument("-o", "--output", help="Results file (default: bench-<workload>.json)")
+    runner.set_defaults(handler=run_command)
+
+    comparer = commands.add_parser("compare", help="Compare two results files")
+    comparer.add_argument("base")
+    comparer.add_argument("new")
+    comparer.add_argument("--tolerance", type=float, default=0.1, help="Allowed relative change")
+    comparer.set_defaults(handler=compare_command)
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
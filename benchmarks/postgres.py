@@ -0,0 +1,101 @@
+"""Throwaway PostgreSQL for benchmarks.
+
+With BENCH_DATABASE_URL set, that (empty, disposable) database is used as is.
+Otherwise a fresh cluster is created with `initdb` in a temporary directory,
+started with `pg_ctl` on a free local port and deleted afterwards. The server
+binaries are looked up on PATH, then in `pg_config --bindir`; PostgreSQL
+refuses to run as root, so run the benchmarks as an ordinary user.
+"""
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+from sqlalchemy.engine import make_url
+
+BENCH_DATABASE = "bench"
+BENCH_USER = "bench"
+
+
+def _env_from_url(url: str) -> Dict[str, str]:
+    parsed = make_url(url)
+    return {
+        "DB_HOST": parsed.host or "127.0.0.1",
+        "DB_PORT": str(parsed.port or 5432),
+        "DB_NAME": parsed.database,
+        "DB_USER": parsed.username,
+        "DB_PASS": parsed.password or "",
+    }
+
+
+def _binary(name: str) -> str:
+    path = shutil.which(name)
+    if path:
+        return path
+    try:
+        bindir = subprocess.run(["pg_config", "--bindir"], check=True, capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        bindir = ""
+    path = os.path.join(bindir, name)
+    if bindir and os.path.exists(path):
+        return path
+    raise RuntimeError(f"{name} not found; install the PostgreSQL server or set BENCH_DATABASE_URL")
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def ephemeral_postgres() -> Iterator[Dict[str, str]]:
+    """Yield the DB_* environment variables of an empty database."""
+    url = os.getenv("BENCH_DATABASE_URL")
+    if url:
+        yield _env_from_url(url)
+        return
+
+    initdb, pg_ctl = _binary("initdb"), _binary("pg_ctl")
+    workdir = tempfile.mkdtemp(prefix="bench-pg-")
+    data = os.path.join(workdir, "data")
+    port = _free_port()
+    quiet = {"check": True, "stdout": subprocess.DEVNULL}
+
+    subprocess.run(
+        [initdb, "-D", data, "-U", BENCH_USER, "--auth=trust", "--encoding=UTF8", "--no-sync"],
+        **quiet,
+    )
+    try:
+        subprocess.run(
+            [
+                pg_ctl, "-D", data, "-l", os.path.join(workdir, "postgres.log"), "-w",
+                "-o", f"-p {port} -k {workdir} -c listen_addresses=127.0.0.1 -c max_connections=200",
+                "start",
+            ],
+            **quiet,
+        )
+        try:
+            import psycopg2
+
+            conn = psycopg2.connect(host="127.0.0.1", port=port, user=BENCH_USER, dbname="postgres")
+            conn.autocommit = True
+            with conn.cursor() as cur:
+                cur.execute(f"CREATE DATABASE {BENCH_DATABASE}")
+            conn.close()
+
+            yield {
+                "DB_HOST": "127.0.0.1",
+                "DB_PORT": str(port),
+                "DB_NAME": BENCH_DATABASE,
+                "DB_USER": BENCH_USER,
+                # Trust auth ignores it, but database/db.py requires one.
+                "DB_PASS": "bench",
+            }
+        finally:
+            subprocess.run([pg_ctl, "-D", data, "-m", "fast", "-w", "stop"], **quiet)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
@@ -0,0 +1,103 @@
+"""Check how many statements each user endpoint's service call executes.
+
+Runs the sync services once each against a throwaway database
+(benchmarks/postgres.py) with the user cache off, so every credential check
+reaches PostgreSQL, and exits non-zero when a call's round trips differ from
+its budget:
+
+    python -m benchmarks.query_counts
+"""
+import json
+import os
+import sys
+from typing import Callable, Dict, List
+
+from benchmarks.postgres import ephemeral_postgres
+
+# Statements per call; COMMIT is not counted.
+ROUND_TRIPS = {
+    "signup": 1,  # INSERT ... ON CONFLICT (email) DO NOTHING RETURNING
+    "signin": 1,  # credential SELECT
+    "profile": 1,  # credential SELECT
+    "session_profile": 1,  # SELECT matching id and session_version
+    "session_update": 1,  # UPDATE ... RETURNING matching id and session_version
+    "update": 2,  # credential SELECT, UPDATE ... RETURNING
+    "change_password": 2,  # credential SELECT, UPDATE ... RETURNING
+}
+
+EMAIL = "round-trips@example.com"
+PASSWORD = "round-trips"
+
+
+def check() -> Dict:
+    # Imported here: the services read their settings at import time.
+    from database.db import SessionLocal, get_engine
+    from database.query_stats import count_queries
+    from models.user import User
+    from schemas.user import UserChangePassword, UserCreate, UserProfileView, UserSessionUpdate, UserSignIn, UserUpdate
+    from services import service
+    from services.password_hasher import password_hasher
+    from services.session_token import verify_session_token
+
+    User.__table__.drop(get_engine(), checkfirst=True)
+    User.__table__.create(get_engine())
+    counts: Dict[str, int] = {}
+    failures: List[str] = []
+
+    def measure(name: str, call: Callable) -> Dict:
+        result = None
+        try:
+            with SessionLocal() as db, count_queries(expected=ROUND_TRIPS[name]) as stats:
+                result = call(db)
+        except AssertionError as exc:
+            failures.append(f"{name}: {exc}")
+        counts[name] = stats.count
+        return result
+
+    try:
+        measure("signup", lambda db: service.signup_user(UserCreate(name="Round Trips", email=EMAIL, password=PASSWORD), db))
+        signed_in = measure(
+            "signin",
+            lambda db: service.signin_user(UserSignIn(email=EMAIL, password=PASSWORD, issue_token=True), db),
+        )
+        claims = verify_session_token(signed_in["session_token"])
+        measure("profile", lambda db: service.view_profile(UserProfileView(email=EMAIL, password=PASSWORD), db))
+        measure("session_profile", lambda db: service.view_profile_by_session(claims, db))
+        measure(
+            "session_update",
+            lambda db: service.update_user_by_session(UserSessionUpdate(name="Session Update"), claims, db),
+        )
+        measure("update", lambda db: service.update_user(UserUpdate(email=EMAIL, password=PASSWORD, age=30), db))
+        measure(
+            "change_password",
+            lambda db: service.change_password(
+                UserChangePassword(email=EMAIL, current_password=PASSWORD, new_password=PASSWORD[::-1]), db
+            ),
+        )
+    finally:
+        password_hasher.shutdown()
+        get_engine().dispose()
+
+    return {"round_trips": counts, "expected": ROUND_TRIPS, "failures": failures}
+
+
+def main() -> int:
+    with ephemeral_postgres() as db_env:
+        os.environ.update({
+            "SESSION_TOKEN_SECRET": "round-trips",
+            **os.environ,
+            **db_env,
+            "DB_REPLICA_URLS": "",
+            "USER_CACHE_BACKEND": "none",
+            # Statements are only counted on instrumented engines.
+            "METRICS_ENABLED": "true",
+            "BCRYPT_ROUNDS": "4",
+        })
+        report = check()
+
+    print(json.dumps(report, indent=2))
+    return 1 if report["failures"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
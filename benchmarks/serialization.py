@@ -0,0 +1,126 @@
+"""Compare response serialization paths on a large admin user listing.
+
+Needs no database; rows are generated in memory:
+
+    python -m benchmarks.serialization --rows 1000 --repeat 50
+"""
+import argparse
+import json
+import time
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+from typing import Callable, Dict, List
+
+from fastapi.encoders import jsonable_encoder
+
+from database.ids import uuid7
+from schemas.responses import AdminUserPage
+from services import serialization
+
+
+def _rows(count: int) -> List[SimpleNamespace]:
+    created = datetime(2026, 1, 1)
+    return [
+        SimpleNamespace(
+            id=uuid7(),
+            name=f"User {i}",
+            email=f"user{i}@example.com",
+            phone_number="+1234567890",
+            date_of_birth=date(1990, 1, 1) + timedelta(days=i % 3650),
+            age=30 + i % 40,
+            blood_group="O+",
+            created_ts=created + timedelta(seconds=i),
+        )
+        for i in range(count)
+    ]
+
+
+def _native_page(rows) -> Dict:
+    return {
+        "users": [
+            {
+                "id": row.id,
+                "name": row.name,
+                "email": row.email,
+                "phone_number": row.phone_number,
+                "date_of_birth": row.date_of_birth,
+                "age": row.age,
+                "blood_group": row.blood_group,
+                "created_ts": row.created_ts,
+            }
+            for row in rows
+        ],
+        "next_cursor": None,
+        "total": None,
+    }
+
+
+def _stdlib_render(content) -> bytes:
+    # What starlette's JSONResponse does.
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+
+def legacy(rows) -> bytes:
+    """Strings built by hand, then jsonable_encoder and stdlib json (no response_model)."""
+    page = {
+        "users": [
+            {
+                "id": str(row.id),
+                "name": row.name,
+                "email": row.email,
+                "phone_number": row.phone_number,
+                "date_of_birth": row.date_of_birth.isoformat() if row.date_of_birth else None,
+                "age": row.age,
+                "blood_group": row.blood_group,
+                "created_ts": row.created_ts.isoformat() if row.created_ts else None,
+            }
+            for row in rows
+        ],
+        "next_cursor": None,
+    }
+    return _stdlib_render(jsonable_encoder(page))
+
+
+def response_model(rows) -> bytes:
+    """Validation against the response model, then jsonable_encoder and stdlib
+    json, as FastAPI does on pydantic 1 (FAST_JSON=false)."""
+    page = AdminUserPage.parse_obj(_native_page(rows))
+    return _stdlib_render(jsonable_encoder(page))
+
+
+def fast_json(rows) -> bytes:
+    """Rows straight to bytes (the default, FAST_JSON=true)."""
+    return serialization.dumps(_native_page(rows))
+
+
+def _time(fn: Callable, rows, repeat: int) -> float:
+    fn(rows)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn(rows)
+    return (time.perf_counter() - started) / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    serialization.FAST_JSON = True
+    rows = _rows(args.rows)
+    results = {name: _time(fn, rows, args.repeat) for name, fn in (
+        ("legacy", legacy),
+        ("response_model", response_model),
+        ("fast_json", fast_json),
+    )}
+    print(json.dumps({
+        "rows": args.rows,
+        "orjson": serialization.orjson is not None,
+        "ms_per_response": {name: round(seconds * 1000, 3) for name, seconds in results.items()},
+        "speedup_vs_legacy": {name: round(results["legacy"] / seconds, 2) for name, seconds in results.items()},
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Compare insert throughput and primary-key index size for uuid4 vs UUIDv7.
+
+Runs against the PostgreSQL configured by the usual DB_* variables and only
+touches two scratch tables, which are dropped afterwards:
+
+    python -m benchmarks.uuid_keys --rows 500000 --batch 5000
+"""
+import argparse
+import json
+import time
+import uuid
+
+from sqlalchemy import text
+
+from database.db import engine
+from database.ids import uuid7
+
+GENERATORS = {"uuid4": uuid.uuid4, "uuid7": uuid7}
+
+
+def run(name: str, rows: int, batch: int) -> dict:
+    table = f"bench_keys_{name}"
+    generate = GENERATORS[name]
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+        conn.execute(text(f"CREATE TABLE {table} (id uuid PRIMARY KEY, payload text NOT NULL)"))
+
+    insert = text(f"INSERT INTO {table} (id, payload) VALUES (:id, :payload)")
+    started = time.perf_counter()
+    for offset in range(0, rows, batch):
+        params = [{"id": generate(), "payload": "x" * 64} for _ in range(min(batch, rows - offset))]
+        with engine.begin() as conn:
+            conn.execute(insert, params)
+    elapsed = time.perf_counter() - started
+
+    with engine.begin() as conn:
+        index_bytes = conn.execute(text(f"SELECT pg_relation_size('{table}_pkey')")).scalar()
+        conn.execute(text(f"DROP TABLE {table}"))
+
+    return {
+        "generator": name,
+        "rows": rows,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(rows / elapsed, 1),
+        "index_bytes": index_bytes,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--batch", type=int, default=5_000)
+    args = parser.parse_args()
+
+    results = [run(name, args.rows, args.batch) for name in GENERATORS]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
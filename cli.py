@@ -0,0 +1,93 @@
+"""Command line tools for the User Log API.
+
+    python cli.py import-users users.csv
+    python cli.py import-users - --format ndjson < users.ndjson
+    python cli.py export-activities --start 2026-01-01 --end 2026-02-01 --gzip -o jan.ndjson.gz
+"""
+import argparse
+import json
+import sys
+from datetime import datetime
+
+
+def import_users_command(args: argparse.Namespace) -> int:
+    # Imported here so `--help` works without database settings.
+    from database.db import SessionLocal
+    from services.import_service import USER_IMPORT_CHUNK_SIZE, import_users
+    from services.password_hasher import password_hasher
+
+    fmt = args.format or ("csv" if args.path.lower().endswith(".csv") else "ndjson")
+    stream = sys.stdin if args.path == "-" else open(args.path, encoding="utf-8-sig", newline="")
+    try:
+        with SessionLocal() as db:
+            report = import_users(db, stream, fmt, chunk_size=args.chunk_size or USER_IMPORT_CHUNK_SIZE)
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+        password_hasher.shutdown()
+
+    errors = report.pop("errors")
+    if args.report:
+        with open(args.report, "w") as handle:
+            json.dump(errors, handle, indent=2)
+    else:
+        for error in errors:
+            print(json.dumps(error), file=sys.stderr)
+    print(json.dumps(report))
+    return 1 if report["failed"] else 0
+
+
+def export_activities_command(args: argparse.Namespace) -> int:
+    from schemas.activity import ActivityFilters
+    from services.export_service import iter_activity_export
+
+    filters = ActivityFilters(
+        action=args.action,
+        status=args.status,
+        endpoint=args.endpoint,
+        start=args.start,
+        end=args.end,
+    )
+    output = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+    try:
+        for chunk in iter_activity_export(filters, user_id=args.user_id, fmt=args.format, compress=args.gzip):
+            output.write(chunk)
+    finally:
+        if output is not sys.stdout.buffer:
+            output.close()
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="User Log API command line tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    importer = commands.add_parser("import-users", help="Bulk-create users from a CSV or NDJSON file")
+    importer.add_argument("path", help="input file, or - for stdin")
+    importer.add_argument("--format", choices=("csv", "ndjson"), help="defaults to the file extension")
+    importer.add_argument("--chunk-size", type=int, default=None, help="records loaded per transaction")
+    importer.add_argument("--report", help="write the per-line error report to this JSON file")
+    importer.set_defaults(handler=import_users_command)
+
+    exporter = commands.add_parser("export-activities", help="Stream activity history as CSV or NDJSON")
+    exporter.add_argument("--start", type=datetime.fromisoformat, help="ISO timestamp, inclusive")
+    exporter.add_argument("--end", type=datetime.fromisoformat, help="ISO timestamp, exclusive")
+    exporter.add_argument("--user-id")
+    exporter.add_argument("--action")
+    exporter.add_argument("--status")
+    exporter.add_argument("--endpoint")
+    exporter.add_argument("--format", choices=("csv", "ndjson"), default="ndjson")
+    exporter.add_argument("--gzip", action="store_true", help="gzip-compress the output")
+    exporter.add_argument("-o", "--output", default="-", help="output file, or - for stdout")
+    exporter.set_defaults(handler=export_activities_command)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,15 @@
 import os
-from typing import Generator
+import threading
+import time
+from typing import AsyncGenerator, Dict, Generator, Optional
 
 from dotenv import load_dotenv
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from database.query_stats import instrument_engine
 
 load_dotenv()
 
@@ -14,33 +20,240 @@ DB_USER = os.getenv("DB_USER")
 DB_PASS = os.getenv("DB_PASS")
 DB_SCHEMA = os.getenv("DB_SCHEMA")
 
-required_vars = {
-    "DB_HOST": DB_HOST,
-    "DB_PORT": DB_PORT,
-    "DB_NAME": DB_NAME,
-    "DB_USER": DB_USER,
-    "DB_PASS": DB_PASS,
-}
+# Connection pool configuration
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
 
-missing = [name for name, value in required_vars.items() if not value]
-if missing:
-    raise RuntimeError(f"Missing required database environment variables: {', '.join(missing)}")
+# Serve the user and activity routes from an asyncpg-backed AsyncSession.
+DB_ASYNC = os.getenv("DB_ASYNC", "false").lower() in ("1", "true", "yes")
 
 DATABASE_URL = (
     f"postgresql+psycopg2://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 )
+ASYNC_DATABASE_URL = (
+    f"postgresql+asyncpg://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+)
+
+
+
+class PoolMetrics:
+    """Checkout wait-time counters shared by the instrumented pools."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record(self, waited: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+
+pool_metrics = PoolMetrics()
+async_pool_metrics = PoolMetrics()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection."""
+
+    metrics = pool_metrics
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except Exception:
+            self.metrics.record(time.perf_counter() - started, timed_out=True)
+            raise
+        self.metrics.record(time.perf_counter() - started)
+        return connection
+
+
+class InstrumentedAsyncQueuePool(InstrumentedQueuePool, AsyncAdaptedQueuePool):
+    metrics = async_pool_metrics
+
+
+if DB_ASYNC:
+    # Only loaded when the async routes are in use.
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+
+class _Sessionmaker(sessionmaker):
+    """sessionmaker that creates the engines on first use."""
+
+    def __call__(self, **local_kw):
+        configure()
+        return super().__call__(**local_kw)
+
+
+SessionLocal = _Sessionmaker(autocommit=False, autoflush=False)
+
+AsyncSessionLocal = None
+if DB_ASYNC:
+
+    class _AsyncSessionmaker(async_sessionmaker):
+        def __call__(self, **local_kw):
+            configure()
+            return super().__call__(**local_kw)
+
+    AsyncSessionLocal = _AsyncSessionmaker(autoflush=False, expire_on_commit=False)
+
+_engine: Optional[Engine] = None
+_async_engine = None
+_configure_lock = threading.Lock()
+
+
+def configure() -> None:
+    """Validate the DB_* settings and create the engines, once.
 
-engine = create_engine(DATABASE_URL)
+    Importing this module does neither, so tools and tests that never touch
+    the database start fast. The app calls this from its lifespan, so a bad
+    configuration fails startup; anything else configures on first use of
+    `SessionLocal` or `engine`.
+    """
+    global _engine, _async_engine
+    if _engine is not None:
+        return
+    with _configure_lock:
+        if _engine is not None:
+            return
+
+        required_vars = {
+            "DB_HOST": DB_HOST,
+            "DB_PORT": DB_PORT,
+            "DB_NAME": DB_NAME,
+            "DB_USER": DB_USER,
+            "DB_PASS": DB_PASS,
+        }
+        missing = [name for name, value in required_vars.items() if not value]
+        if missing:
+            raise RuntimeError(f"Missing required database environment variables: {', '.join(missing)}")
+
+        engine = create_engine(
+            DATABASE_URL,
+            poolclass=InstrumentedQueuePool,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_pre_ping=DB_POOL_PRE_PING,
+            pool_recycle=DB_POOL_RECYCLE,
+        )
+        instrument_engine(engine)
+        SessionLocal.configure(bind=engine)
+
+        if DB_ASYNC:
+            _async_engine = create_async_engine(
+                ASYNC_DATABASE_URL,
+                poolclass=InstrumentedAsyncQueuePool,
+                pool_size=DB_POOL_SIZE,
+                max_overflow=DB_MAX_OVERFLOW,
+                pool_timeout=DB_POOL_TIMEOUT,
+                pool_pre_ping=DB_POOL_PRE_PING,
+                pool_recycle=DB_POOL_RECYCLE,
+            )
+            instrument_engine(_async_engine.sync_engine)
+            AsyncSessionLocal.configure(bind=_async_engine)
+
+        _engine = engine
+
+
+def get_engine() -> Engine:
+    configure()
+    return _engine
+
+
+def get_async_engine():
+    """The async engine, or None unless DB_ASYNC is enabled."""
+    configure()
+    return _async_engine
+
+
+def __getattr__(name: str):
+    # `from database.db import engine` keeps working, configuring on access.
+    if name == "engine":
+        return get_engine()
+    if name == "async_engine":
+        return get_async_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+async def dispose_engines() -> None:
+    """Close every pooled connection of the engines created so far."""
+    if _async_engine is not None:
+        await _async_engine.dispose()
+    if _engine is not None:
+        _engine.dispose()
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base(metadata=None)
 
 
 def get_db() -> Generator:
-    """Database dependency."""
+    """Database dependency: one session per request, closed when it ends."""
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db() -> AsyncGenerator:
+    """Async database dependency, available when DB_ASYNC is enabled."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def warm_pool(size: int = DB_POOL_SIZE) -> None:
+    """Open `size` pooled connections up front so early requests skip the connect."""
+    connections = []
+    try:
+        for _ in range(size):
+            connections.append(get_engine().connect())
+    finally:
+        for connection in connections:
+            connection.close()
+
+
+async def warm_async_pool(size: int = DB_POOL_SIZE) -> None:
+    """`warm_pool` for the async engine, when DB_ASYNC is enabled."""
+    connections = []
+    try:
+        for _ in range(size):
+            connections.append(await get_async_engine().connect())
+    finally:
+        for connection in connections:
+            await connection.close()
+
+
+def _pool_snapshot(pool: QueuePool, metrics: PoolMetrics) -> Dict:
+    checkouts = metrics.checkouts
+    return {
+        "size": pool.size(),
+        "max_overflow": DB_MAX_OVERFLOW,
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": pool.overflow(),
+        "checkouts": checkouts,
+        "timeouts": metrics.timeouts,
+        "wait_seconds_total": metrics.wait_seconds_total,
+        "wait_seconds_avg": metrics.wait_seconds_total / checkouts if checkouts else 0.0,
+        "wait_seconds_max": metrics.wait_seconds_max,
+    }
+
+
+def pool_stats() -> Dict:
+    """Snapshot of pool occupancy and checkout wait times."""
+    stats = _pool_snapshot(get_engine().pool, pool_metrics)
+    if get_async_engine() is not None:
+        stats["async"] = _pool_snapshot(get_async_engine().pool, async_pool_metrics)
+    return stats
@@ -0,0 +1,153 @@
+import logging
+import os
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Query instrumentation configuration; engines are instrumented only with
+# request metrics on (same METRICS_ENABLED switch as middleware/metrics.py)
+QUERY_STATS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+DB_SLOW_QUERY_SECONDS = float(os.getenv("DB_SLOW_QUERY_SECONDS", "0.5"))
+# Executions of one statement shape within a request before it is flagged
+DB_REPEATED_QUERY_THRESHOLD = int(os.getenv("DB_REPEATED_QUERY_THRESHOLD", "10"))
+
+_WHITESPACE = re.compile(r"\s+")
+_EXPANDED_IN = re.compile(r"\bIN\s*\((?:[^()]|\([^()]*\))*\)", re.IGNORECASE)
+_NUMBER = re.compile(r"\b\d+\b")
+
+
+def statement_shape(statement: str) -> str:
+    """`statement` with whitespace collapsed and IN lists and numbers folded, so
+    executions that differ only in their values compare equal."""
+    shape = _WHITESPACE.sub(" ", statement).strip()
+    shape = _EXPANDED_IN.sub("IN (...)", shape)
+    return _NUMBER.sub("?", shape)
+
+
+def redact_parameters(parameters) -> object:
+    """Parameter names (or positions) with every value replaced by its type."""
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            return f"<{len(parameters)} parameter sets>"
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+class QueryStats:
+    """Statements executed while one request (or `count_queries` block) ran."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.slowest_statement: Optional[str] = None
+        self.shapes: Dict[str, int] = {}
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.seconds += seconds
+        shape = statement_shape(statement)
+        self.shapes[shape] = self.shapes.get(shape, 0) + 1
+        if seconds >= self.slowest_seconds:
+            self.slowest_seconds = seconds
+            self.slowest_statement = shape
+
+    def repeated(self, threshold: int = DB_REPEATED_QUERY_THRESHOLD) -> List[Tuple[str, int]]:
+        """Statement shapes executed at least `threshold` times, most frequent first."""
+        return sorted(
+            ((shape, count) for shape, count in self.shapes.items() if count >= threshold),
+            key=lambda item: -item[1],
+        )
+
+    def summary(self) -> str:
+        return "\n".join(f"{count}x {shape}" for shape, count in sorted(self.shapes.items(), key=lambda item: -item[1]))
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+_query_callbacks: List[Callable[[float], None]] = []
+
+
+def on_query(callback: Callable[[float], None]) -> None:
+    """Call `callback(seconds)` after every statement an instrumented engine runs."""
+    _query_callbacks.append(callback)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Record every statement executed in this context (and threads it starts)."""
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+@contextmanager
+def count_queries(expected: Optional[int] = None, max_queries: Optional[int] = None) -> Iterator[QueryStats]:
+    """Assert how many statements the enclosed block executes.
+
+        with count_queries(expected=1):
+            signup_user(payload, db)
+
+    Raises AssertionError listing the executed statement shapes when the count
+    differs from `expected` or exceeds `max_queries`. The yielded QueryStats
+    can also be inspected directly. Only instrumented engines are counted.
+    """
+    with track_queries() as stats:
+        yield stats
+    if expected is not None and stats.count != expected:
+        raise AssertionError(f"expected {expected} queries, executed {stats.count}:\n{stats.summary()}")
+    if max_queries is not None and stats.count > max_queries:
+        raise AssertionError(f"expected at most {max_queries} queries, executed {stats.count}:\n{stats.summary()}")
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    for callback in _query_callbacks:
+        callback(elapsed)
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(statement, elapsed)
+    if elapsed >= DB_SLOW_QUERY_SECONDS:
+        logger.warning(
+            "Slow query (%.3fs): %s parameters=%s",
+            elapsed,
+            _WHITESPACE.sub(" ", statement).strip(),
+            redact_parameters(parameters),
+        )
+
+
+def _handle_error(exception_context) -> None:
+    # A failed statement never reaches after_cursor_execute.
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_started"):
+        connection.info["query_started"].pop()
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Time and count every statement `engine` executes.
+
+    Pass the sync engine; for an AsyncEngine that is `async_engine.sync_engine`.
+    A no-op when METRICS_ENABLED is off.
+    """
+    if not QUERY_STATS_ENABLED:
+        return
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
@@ -0,0 +1,208 @@
+import logging
+import os
+import threading
+import time
+from typing import AsyncGenerator, Dict, Generator, List, Optional
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.orm import Session
+
+from database.db import (
+    DB_ASYNC,
+    DB_MAX_OVERFLOW,
+    DB_POOL_PRE_PING,
+    DB_POOL_RECYCLE,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+    AsyncSessionLocal,
+    SessionLocal,
+)
+from database.query_stats import instrument_engine
+
+logger = logging.getLogger(__name__)
+
+# Read replica configuration
+DB_REPLICA_URLS = [url.strip() for url in os.getenv("DB_REPLICA_URLS", "").split(",") if url.strip()]
+DB_REPLICA_MAX_LAG = float(os.getenv("DB_REPLICA_MAX_LAG", "5"))
+DB_REPLICA_CHECK_INTERVAL = float(os.getenv("DB_REPLICA_CHECK_INTERVAL", "1"))
+
+# Lag is zero when the replica has replayed everything it received, so an idle
+# primary does not look like lag; NULL (treated as zero) on a server that is not
+# a standby. A standby cut off from the primary has also replayed everything it
+# received, so it is only trusted while its WAL receiver is streaming (the
+# status is visible to superusers and members of pg_read_all_stats).
+_LAG_QUERY = text(
+    "SELECT pg_is_in_recovery(), "
+    "EXISTS (SELECT 1 FROM pg_stat_wal_receiver WHERE status = 'streaming'), "
+    "CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+_POOL_OPTIONS = dict(
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_pre_ping=DB_POOL_PRE_PING,
+    pool_recycle=DB_POOL_RECYCLE,
+)
+
+
+class Replica:
+    """One replica's engines and its most recently measured lag."""
+
+    def __init__(self, url: str) -> None:
+        parsed = make_url(url).set(drivername="postgresql+psycopg2")
+        self.name = parsed.render_as_string(hide_password=True)
+        self.engine: Engine = create_engine(parsed, **_POOL_OPTIONS)
+        instrument_engine(self.engine)
+        self.async_engine = None
+        if DB_ASYNC:
+            from sqlalchemy.ext.asyncio import create_async_engine
+
+            self.async_engine = create_async_engine(parsed.set(drivername="postgresql+asyncpg"), **_POOL_OPTIONS)
+            instrument_engine(self.async_engine.sync_engine)
+
+        self.lag: Optional[float] = None
+        self.checked_at: Optional[float] = None
+        self.error: Optional[str] = None
+
+    def check(self) -> None:
+        try:
+            with self.engine.connect() as conn:
+                standby, streaming, lag = conn.execute(_LAG_QUERY).one()
+            if standby and not streaming:
+                self.lag = None
+                self.error = "Not streaming from the primary"
+            else:
+                self.lag = float(lag or 0.0)
+                self.error = None
+        except Exception as exc:
+            self.lag = None
+            self.error = str(exc).splitlines()[0] if str(exc) else type(exc).__name__
+        self.checked_at = time.monotonic()
+
+    def usable(self, max_lag: float, stale_after: float) -> bool:
+        return (
+            self.lag is not None
+            and self.lag <= max_lag
+            and self.checked_at is not None
+            and time.monotonic() - self.checked_at <= stale_after
+        )
+
+
+class ReplicaRouter:
+    """Round-robins read-only sessions across replicas that are caught up.
+
+    A background thread measures every replica's replay lag each
+    `check_interval` seconds. Reads go to the next replica whose last check
+    succeeded, is recent and is within `max_lag` seconds; when none qualifies
+    (or before the first check) they fall back to the primary.
+    """
+
+    def __init__(
+        self,
+        urls: List[str] = DB_REPLICA_URLS,
+        max_lag: float = DB_REPLICA_MAX_LAG,
+        check_interval: float = DB_REPLICA_CHECK_INTERVAL,
+    ) -> None:
+        self.urls = list(urls)
+        # Engines are created by start(), not at import.
+        self.replicas: List[Replica] = []
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+
+        self._next = 0
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.replica_reads = 0
+        self.primary_reads = 0
+
+    def start(self) -> None:
+        if not self.replicas:
+            self.replicas = [Replica(url) for url in self.urls]
+        if not self.replicas or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="replica-lag", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while True:
+            for replica in self.replicas:
+                replica.check()
+            if self._stopping.wait(self.check_interval):
+                break
+
+    def pick(self) -> Optional[Replica]:
+        """Return the next usable replica, or None to read from the primary."""
+        # A check older than a few intervals means the monitor is not running.
+        stale_after = self.check_interval * 3 + 1
+        with self._lock:
+            for _ in range(len(self.replicas)):
+                replica = self.replicas[self._next]
+                self._next = (self._next + 1) % len(self.replicas)
+                if replica.usable(self.max_lag, stale_after):
+                    self.replica_reads += 1
+                    return replica
+            self.primary_reads += 1
+        return None
+
+    async def dispose(self) -> None:
+        for replica in self.replicas:
+            replica.engine.dispose()
+            if replica.async_engine is not None:
+                await replica.async_engine.dispose()
+
+    def stats(self) -> Dict:
+        return {
+            "max_lag": self.max_lag,
+            "replica_reads": self.replica_reads,
+            "primary_reads": self.primary_reads,
+            "replicas": [
+                {
+                    "url": replica.name,
+                    "lag": replica.lag,
+                    "error": replica.error,
+                    "usable": replica.usable(self.max_lag, self.check_interval * 3 + 1),
+                    "checked_out": replica.engine.pool.checkedout(),
+                }
+                for replica in self.replicas
+            ],
+        }
+
+
+replica_router = ReplicaRouter()
+
+
+def read_session() -> Session:
+    """A session on a caught-up replica, or on the primary when none is."""
+    replica = replica_router.pick()
+    if replica is None:
+        return SessionLocal()
+    return SessionLocal(bind=replica.engine)
+
+
+def get_read_db() -> Generator:
+    """Database dependency for read-only routes: may be served by a replica."""
+    db = read_session()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db() -> AsyncGenerator:
+    """Async counterpart of `get_read_db`, available when DB_ASYNC is enabled."""
+    replica = replica_router.pick()
+    bind = {} if replica is None else {"bind": replica.async_engine}
+    async with AsyncSessionLocal(**bind) as db:
+        yield db
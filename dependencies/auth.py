@@ -1,9 +1,10 @@
 from typing import Dict, Optional
 
-from fastapi import Depends, HTTPException, Request, status
+from fastapi import Depends, Header, HTTPException, Request, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 
 from middleware.auth import get_current_user, is_public_endpoint
+from services.session_token import verify_session_token
 
 security = HTTPBearer()
 
@@ -37,3 +38,8 @@ async def get_current_user_required(
         )
     
     return await get_current_user(request, credentials)
+
+
+async def get_session_claims(x_session_token: str = Header(...)) -> Dict:
+    """Get the claims of the session token issued by /signin (one HMAC check)."""
+    return verify_session_token(x_session_token)
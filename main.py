@@ -1,22 +1,69 @@
-from database.db import Base, engine
-from models.user import User
-from models.activity import UserActivity
+import os
+
 import uvicorn
 
 
+def _flag(name: str, default: bool) -> bool:
+    return os.getenv(name, str(default)).lower() in ("1", "true", "yes")
+
+
+def available_cpus() -> int:
+    """CPUs this process may run on (respects affinity and cpusets)."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
 class Settings:
     def __init__(self) -> None:
-        self.host: str = "127.0.0.1"
-        self.port: int = 8000
-        self.debug: bool = True
+        # development: one process with the reloader; production: a worker per core
+        self.environment: str = os.getenv("APP_ENV", "development")
+        self.production: bool = self.environment == "production"
+        self.host: str = os.getenv("APP_HOST", "0.0.0.0" if self.production else "127.0.0.1")
+        self.port: int = int(os.getenv("APP_PORT", "8000"))
+        self.debug: bool = _flag("APP_DEBUG", not self.production)
+        self.workers: int = int(os.getenv("APP_WORKERS", str(available_cpus() if self.production else 1)))
+        self.access_log: bool = _flag("APP_ACCESS_LOG", not self.production)
+        # Seconds to let in-flight requests finish after SIGTERM before shutdown hooks run
+        self.graceful_timeout: int = int(os.getenv("APP_GRACEFUL_TIMEOUT", "30"))
+        self.keep_alive: int = int(os.getenv("APP_KEEP_ALIVE", "5"))
 
 
 settings = Settings()
 
-if __name__ == "__main__":
+
+def run() -> None:
+    if settings.workers > 1 and not os.getenv("SESSION_TOKEN_SECRET"):
+        # Each worker would sign with its own random secret and reject the
+        # session tokens issued by the others.
+        raise SystemExit("SESSION_TOKEN_SECRET must be set to run more than one worker")
+
+    if settings.workers > 1:
+        # Each worker has its own bcrypt pool; share the cores between them
+        # unless PASSWORD_WORKERS is set explicitly.
+        os.environ.setdefault("PASSWORD_WORKERS", str(max(1, available_cpus() // settings.workers)))
+        # A per-process cache would keep accepting a replaced password on the
+        # workers that did not handle the change; without a shared backend,
+        # check credentials against PostgreSQL.
+        os.environ.setdefault("USER_CACHE_BACKEND", "none")
+        if os.environ["USER_CACHE_BACKEND"] == "memory":
+            raise SystemExit("USER_CACHE_BACKEND=memory is per process; use redis or none to run more than one worker")
+
     uvicorn.run(
         "api.crud:app",
         host=settings.host,
         port=settings.port,
-        reload=settings.debug,
-    )
\ No newline at end of file
+        reload=settings.debug and settings.workers == 1,
+        workers=settings.workers,
+        # uvloop and httptools when installed (pip install "uvicorn[standard]"),
+        # the stdlib asyncio loop and h11 otherwise.
+        loop="auto",
+        http="auto",
+        access_log=settings.access_log,
+        timeout_graceful_shutdown=settings.graceful_timeout,
+        timeout_keep_alive=settings.keep_alive,
+    )
+
+
+if __name__ == "__main__":
+    run()
@@ -1,19 +1,26 @@
 import os
 from typing import Dict, Optional
 
+from anyio import CapacityLimiter, to_thread
 from fastapi import HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
-from sqlalchemy.orm import Session
 
-from database.db import get_db
-from services.activity_service import log_user_activity
+from middleware.jwks import JWKSError, jwks_cache
+from middleware.metrics import phase
+from middleware.token_cache import token_cache
+from services.activity_writer import activity_writer
 
 # Auth0 configuration
 AUTH0_DOMAIN = os.getenv("AUTH0_DOMAIN", "your-auth0-domain.auth0.com")
 AUTH0_API_AUDIENCE = os.getenv("AUTH0_API_AUDIENCE", "your-api-identifier")
 ALGORITHMS = ["RS256"]
 
+# JWT decoding runs in bounded worker threads so it never stalls the event loop.
+AUTH_DECODE_CONCURRENCY = int(os.getenv("AUTH_DECODE_CONCURRENCY", "8"))
+
+decode_limiter = CapacityLimiter(AUTH_DECODE_CONCURRENCY)
+
 security = HTTPBearer()
 
 
@@ -21,6 +28,10 @@ class Auth0Error(Exception):
     """Custom exception for Auth0 errors."""
 
 
+# Cached verifications are only valid for the key set that produced them.
+jwks_cache.on_rotate(token_cache.invalidate)
+
+
 def get_token_from_header(credentials: HTTPAuthorizationCredentials) -> str:
     """Extract token from Authorization header."""
     if not credentials or not credentials.scheme == "Bearer":
@@ -31,45 +42,42 @@ def get_token_from_header(credentials: HTTPAuthorizationCredentials) -> str:
     return credentials.credentials
 
 
-def verify_token(token: str) -> Dict:
+def _decode_token(token: str, rsa_key: Dict) -> Dict:
+    return jwt.decode(
+        token,
+        rsa_key,
+        algorithms=ALGORITHMS,
+        audience=AUTH0_API_AUDIENCE,
+        issuer=f"https://{AUTH0_DOMAIN}/"
+    )
+
+
+async def verify_token(token: str) -> Dict:
     """Verify Auth0 JWT token."""
+    cached = token_cache.get(token)
+    if cached is not None:
+        return cached
+
     try:
-        # Get Auth0 public key
-        jwks_url = f"https://{AUTH0_DOMAIN}/.well-known/jwks.json"
-        import requests
-        
-        response = requests.get(jwks_url)
-        jwks = response.json()
-        
         # Get the unverified header
         unverified_header = jwt.get_unverified_header(token)
         
-        # Find the key
-        rsa_key = None
-        for key in jwks["keys"]:
-            if key["kid"] == unverified_header["kid"]:
-                rsa_key = {
-                    "kty": key["kty"],
-                    "kid": key["kid"],
-                    "use": key["use"],
-                    "n": key["n"],
-                    "e": key["e"]
-                }
+        # Find the key in the cached key set
+        with phase("jwks"):
+            rsa_key = await jwks_cache.get_key(unverified_header.get("kid"))
         
         if rsa_key is None:
             raise Auth0Error("Unable to find a valid signing key")
         
         # Verify the token
-        payload = jwt.decode(
-            token,
-            rsa_key,
-            algorithms=ALGORITHMS,
-            audience=AUTH0_API_AUDIENCE,
-            issuer=f"https://{AUTH0_DOMAIN}/"
-        )
+        with phase("jwt_decode"):
+            payload = await to_thread.run_sync(_decode_token, token, rsa_key, limiter=decode_limiter)
         
+        token_cache.set(token, payload)
         return payload
         
+    except (Auth0Error, JWKSError):
+        raise
     except JWTError as e:
         raise Auth0Error(f"Invalid token: {str(e)}")
     except Exception as e:
@@ -79,12 +87,11 @@ def verify_token(token: str) -> Dict:
 async def get_current_user(
     request: Request,
     credentials: HTTPAuthorizationCredentials = security,
-    db: Session = next(get_db())
 ) -> Dict:
     """Get current authenticated user from token."""
     try:
         token = get_token_from_header(credentials)
-        payload = verify_token(token)
+        payload = await verify_token(token)
         
         # Extract user information
         user_id = payload.get("sub")
@@ -94,16 +101,16 @@ async def get_current_user(
             raise Auth0Error("User ID not found in token")
         
         # Log the activity
-        log_user_activity(
-            db=db,
-            user_id=user_id,
-            user_email=email,
-            action="API_ACCESS",
-            endpoint=str(request.url.path),
-            ip_address=request.client.host if request.client else None,
-            user_agent=request.headers.get("user-agent"),
-            status="SUCCESS"
-        )
+        with phase("activity_log"):
+            await activity_writer.submit_async(
+                user_id=user_id,
+                user_email=email,
+                action="API_ACCESS",
+                endpoint=str(request.url.path),
+                ip_address=request.client.host if request.client else None,
+                user_agent=request.headers.get("user-agent"),
+                status="SUCCESS"
+            )
         
         return {
             "user_id": user_id,
@@ -111,10 +118,16 @@ async def get_current_user(
             "payload": payload
         }
         
+    except JWKSError as e:
+        # The IdP is unreachable; the token may well be valid.
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": str(jwks_cache.retry_after())},
+        )
     except Auth0Error as e:
         # Log failed access attempt
-        log_user_activity(
-            db=db,
+        await activity_writer.submit_async(
             user_id="unknown",
             action="API_ACCESS_FAILED",
             endpoint=str(request.url.path),
@@ -141,7 +154,9 @@ PUBLIC_ENDPOINTS = {
     "/user/profile/view",
     "/user/profile/update",
     "/user/change-password",
-    "/profile"
+    "/profile",
+    "/session/profile",
+    "/session/update",
 }
 
 
@@ -0,0 +1,188 @@
+import asyncio
+import math
+import os
+import time
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional
+
+if TYPE_CHECKING:
+    import httpx
+
+# JWKS cache configuration
+AUTH0_DOMAIN = os.getenv("AUTH0_DOMAIN", "your-auth0-domain.auth0.com")
+AUTH0_JWKS_URL = os.getenv("AUTH0_JWKS_URL", f"https://{AUTH0_DOMAIN}/.well-known/jwks.json")
+JWKS_CACHE_TTL = float(os.getenv("JWKS_CACHE_TTL", "3600"))
+JWKS_MIN_REFRESH_INTERVAL = float(os.getenv("JWKS_MIN_REFRESH_INTERVAL", "30"))
+JWKS_FETCH_TIMEOUT = float(os.getenv("JWKS_FETCH_TIMEOUT", "5"))
+JWKS_MAX_CONNECTIONS = int(os.getenv("JWKS_MAX_CONNECTIONS", "10"))
+
+
+class JWKSError(Exception):
+    """Raised when no signing key set can be obtained."""
+
+
+def _parse_keys(jwks: Dict) -> Dict[str, Dict]:
+    """Index the RSA keys of a JWKS document by their `kid`."""
+    keys = {}
+    for key in jwks.get("keys", []):
+        if "kid" not in key:
+            continue
+        keys[key["kid"]] = {
+            "kty": key["kty"],
+            "kid": key["kid"],
+            "use": key.get("use", "sig"),
+            "n": key["n"],
+            "e": key["e"],
+        }
+    return keys
+
+
+class JWKSCache:
+    """In-process cache of the Auth0 signing keys.
+
+    Keys are served from memory until `ttl` expires. A token carrying an
+    unknown `kid` triggers an early refresh, rate limited by
+    `min_refresh_interval`. Concurrent refreshes are collapsed into one fetch,
+    and the last good key set keeps being served if the IdP is unreachable.
+
+    Fetches go through a pooled `httpx.AsyncClient`, so a slow IdP only delays
+    the requests that actually need new keys and never blocks the event loop.
+    """
+
+    def __init__(
+        self,
+        url: str = AUTH0_JWKS_URL,
+        ttl: float = JWKS_CACHE_TTL,
+        min_refresh_interval: float = JWKS_MIN_REFRESH_INTERVAL,
+        timeout: float = JWKS_FETCH_TIMEOUT,
+    ) -> None:
+        self.url = url
+        self.ttl = ttl
+        self.min_refresh_interval = min_refresh_interval
+        self.timeout = timeout
+
+        self._keys: Dict[str, Dict] = {}
+        self._fetched_at: Optional[float] = None
+        self._last_attempt: Optional[float] = None
+        self._attempts = 0
+        self._refresh_lock = asyncio.Lock()
+        self._client: Optional["httpx.AsyncClient"] = None
+        self._listeners: List[Callable[[], None]] = []
+
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.stale_served = 0
+
+    def _new_client(self) -> "httpx.AsyncClient":
+        # Imported on first fetch (the startup warm-up) to keep imports light.
+        import httpx
+
+        return httpx.AsyncClient(
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=JWKS_MAX_CONNECTIONS),
+        )
+
+    async def _get_client(self) -> "httpx.AsyncClient":
+        if self._client is None:
+            # Loading the CA bundle takes ~100 ms; keep it off the event loop.
+            # Only called under the refresh lock, so one client is built.
+            self._client = await asyncio.to_thread(self._new_client)
+        return self._client
+
+    async def _fetch(self) -> Dict:
+        client = await self._get_client()
+        response = await client.get(self.url)
+        response.raise_for_status()
+        return response.json()
+
+    async def aclose(self) -> None:
+        """Close the pooled HTTP client."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _is_fresh(self, now: float) -> bool:
+        return self._fetched_at is not None and now - self._fetched_at < self.ttl
+
+    async def refresh(self, force: bool = False) -> None:
+        """Refetch the key set, collapsing concurrent callers into one fetch."""
+        attempt = self._attempts
+        async with self._refresh_lock:
+            # Another caller refreshed while we were waiting for the lock.
+            if self._attempts != attempt:
+                return
+            if not force and self._is_fresh(time.monotonic()):
+                return
+
+            self._last_attempt = time.monotonic()
+            try:
+                keys = _parse_keys(await self._fetch())
+            except Exception as exc:
+                self._attempts += 1
+                self.refresh_errors += 1
+                if not self._keys:
+                    raise JWKSError(f"Unable to fetch signing keys: {exc}")
+                # Keep serving the stale key set while the IdP is down.
+                self.stale_served += 1
+                return
+
+            self._attempts += 1
+            rotated = bool(self._keys) and set(keys) != set(self._keys)
+            self._keys = keys
+            self._fetched_at = self._last_attempt
+            self.refreshes += 1
+
+        if rotated:
+            for listener in self._listeners:
+                listener()
+
+    async def get_key(self, kid: str) -> Optional[Dict]:
+        """Return the signing key for `kid`, refreshing the key set if needed."""
+        now = time.monotonic()
+        if not self._keys:
+            # Until a key set has been fetched, the IdP is retried at most once
+            # per interval; callers in between fail fast unless they can join
+            # a fetch that is already in flight.
+            if self._may_refetch(now) or self._refresh_lock.locked():
+                await self.refresh(force=True)
+            if not self._keys:
+                raise JWKSError("Signing keys are unavailable")
+        else:
+            unknown = kid not in self._keys
+            if (unknown or not self._is_fresh(now)) and self._may_refetch(now):
+                await self.refresh(force=unknown)
+
+        key = self._keys.get(kid)
+        if key is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return key
+
+    def _may_refetch(self, now: float) -> bool:
+        return self._last_attempt is None or now - self._last_attempt >= self.min_refresh_interval
+
+    def retry_after(self) -> int:
+        """Whole seconds until the key set may be fetched again (at least 1)."""
+        if self._last_attempt is None:
+            return 1
+        return max(1, math.ceil(self._last_attempt + self.min_refresh_interval - time.monotonic()))
+
+    def on_rotate(self, listener: Callable[[], None]) -> None:
+        """Register a callback invoked when the served key set changes."""
+        self._listeners.append(listener)
+
+    def stats(self) -> Dict:
+        return {
+            "keys": len(self._keys),
+            "age_seconds": None if self._fetched_at is None else time.monotonic() - self._fetched_at,
+            "hits": self.hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors,
+            "stale_served": self.stale_served,
+        }
+
+
+jwks_cache = JWKSCache()
@@ -0,0 +1,60 @@
+import logging
+import os
+
+from database.query_stats import DB_REPEATED_QUERY_THRESHOLD, track_queries
+
+logger = logging.getLogger(__name__)
+
+# Expose per-request query stats as X-DB-* response headers (debug only)
+DB_QUERY_HEADERS = os.getenv("DB_QUERY_HEADERS", "false").lower() in ("1", "true", "yes")
+
+_SLOWEST_QUERY_HEADER_LENGTH = 200
+
+
+class QueryStatsMiddleware:
+    """ASGI middleware counting the statements each request executes.
+
+    Requests that repeat one statement shape DB_REPEATED_QUERY_THRESHOLD times
+    or more, the usual sign of a query in a loop, are logged with the route.
+    With `headers` set, the count, total time and slowest statement so far
+    are added to the response headers.
+    """
+
+    def __init__(self, app, headers: bool = DB_QUERY_HEADERS) -> None:
+        self.app = app
+        self.headers = headers
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries() as stats:
+
+            async def send_with_headers(message) -> None:
+                if message["type"] == "http.response.start" and self.headers:
+                    slowest = (stats.slowest_statement or "")[:_SLOWEST_QUERY_HEADER_LENGTH]
+                    message["headers"] = [
+                        *message.get("headers", []),
+                        (b"x-db-query-count", str(stats.count).encode()),
+                        (b"x-db-time-ms", f"{stats.seconds * 1000:.2f}".encode()),
+                        (b"x-db-slowest-ms", f"{stats.slowest_seconds * 1000:.2f}".encode()),
+                        (b"x-db-slowest-query", slowest.encode("ascii", "replace")),
+                    ]
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_headers)
+            finally:
+                repeated = stats.repeated(DB_REPEATED_QUERY_THRESHOLD)
+                if repeated:
+                    route = getattr(scope.get("route"), "path", None) or scope.get("path", "")
+                    shape, count = repeated[0]
+                    logger.warning(
+                        "Possible N+1 on %s %s: %d queries, statement repeated %d times: %s",
+                        scope.get("method", ""),
+                        route,
+                        stats.count,
+                        count,
+                        shape,
+                    )
@@ -1,17 +1,29 @@
-import uuid
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, String
+from sqlalchemy import BigInteger, Column, Date, DateTime, Index, Integer, PrimaryKeyConstraint, String
 from sqlalchemy.dialects.postgresql import UUID
 
 from database.db import Base
+from database.ids import uuid7
 
 
 class UserActivity(Base):
     __tablename__ = "user_activity"
+    __table_args__ = (
+        # Leads with the partition key and serves global listings, time-range
+        # scans and (timestamp, id) cursor paging directly.
+        PrimaryKeyConstraint("timestamp", "id"),
+        # Per-user history, newest first, with (timestamp, id) cursor paging
+        Index("ix_user_activity_user_id_timestamp", "user_id", "timestamp", "id"),
+        # Action-specific trends (e.g. LOGIN failures) over a time range
+        Index("ix_user_activity_action_timestamp", "action", "timestamp"),
+        # Daily range partitions, managed by services/partition_service.py
+        {"postgresql_partition_by": "RANGE (timestamp)"},
+    )
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id = Column(String, nullable=False, index=True)  # Auth0 user ID
+    # Time-ordered UUIDv7 so inserts append to the right edge of the index
+    id = Column(UUID(as_uuid=True), nullable=False, default=uuid7)
+    user_id = Column(String, nullable=False)  # Auth0 user ID
     user_email = Column(String, nullable=True, index=True)
     action = Column(String, nullable=False)  # LOGIN, LOGOUT, SIGNUP, PROFILE_UPDATE, etc.
     endpoint = Column(String, nullable=True)  # API endpoint accessed
@@ -20,3 +32,31 @@ class UserActivity(Base):
     timestamp = Column(DateTime, default=datetime.utcnow, nullable=False)
     status = Column(String, nullable=False, default="SUCCESS")  # SUCCESS, FAILED
     details = Column(String, nullable=True)  # Additional details about the activity
+    # Coalesced API_ACCESS rows: number of merged hits and when the last one happened
+    hit_count = Column(Integer, nullable=False, default=1, server_default="1")
+    last_timestamp = Column(DateTime, nullable=True)
+
+
+class UserActivityDaily(Base):
+    """Per-day activity counts kept after a partition is dropped by retention."""
+
+    __tablename__ = "user_activity_daily"
+
+    day = Column(Date, primary_key=True)
+    user_id = Column(String, primary_key=True)
+    action = Column(String, primary_key=True)
+    status = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class UserActivityRollup(Base):
+    """Activity counts per time bucket, maintained by the activity writer."""
+
+    __tablename__ = "user_activity_rollup"
+
+    granularity = Column(String, primary_key=True)  # minute, hour, day
+    bucket = Column(DateTime, primary_key=True)  # start of the bucket (UTC)
+    action = Column(String, primary_key=True)
+    status = Column(String, primary_key=True)
+    endpoint = Column(String, primary_key=True, default="")  # "" when unknown
+    count = Column(BigInteger, nullable=False, default=0)
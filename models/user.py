@@ -1,19 +1,20 @@
-import uuid
-
 from sqlalchemy import Column, Date, DateTime, Integer, String
 from sqlalchemy.dialects.postgresql import UUID
 
 from database.db import Base
+from database.ids import uuid7
 
 
 class User(Base):
     __tablename__ = "user_data"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     name = Column(String, nullable=False)
     email = Column(String, nullable=False, unique=True, index=True)
     # Store the bcrypt-hashed password (e.g., using bcrypt or passlib in your logic)
     password = Column(String, nullable=False)
+    # Bumped on password change to revoke previously issued session tokens
+    session_version = Column(Integer, nullable=False, default=0, server_default="0")
     phone_number = Column(String, nullable=True)
     date_of_birth = Column(Date, nullable=True)
     age = Column(Integer, nullable=True)
@@ -0,0 +1,43 @@
+from datetime import datetime
+from typing import Optional
+
+from fastapi import Query
+
+
+class ActivityFilters:
+    """Activity filters shared by the listing and export endpoints.
+
+    Used as a dependency so every filter is a plain query parameter.
+    """
+
+    def __init__(
+        self,
+        action: Optional[str] = None,
+        status: Optional[str] = None,
+        endpoint: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> None:
+        self.action = action
+        self.status = status
+        self.endpoint = endpoint
+        self.start = start
+        self.end = end
+
+
+class ActivityQuery(ActivityFilters):
+    """Filters plus page size and cursor for the activity listing endpoints."""
+
+    def __init__(
+        self,
+        action: Optional[str] = None,
+        status: Optional[str] = None,
+        endpoint: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        limit: int = Query(100, ge=1, le=1000),
+        cursor: Optional[str] = None,
+    ) -> None:
+        super().__init__(action=action, status=status, endpoint=endpoint, start=start, end=end)
+        self.limit = limit
+        self.cursor = cursor
@@ -0,0 +1,76 @@
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from pydantic import BaseModel
+
+
+class HealthStatus(BaseModel):
+    """Response of the health check."""
+
+    status: str
+    database: str
+
+
+class UserProfile(BaseModel):
+    """A user's profile as returned by the user endpoints; never the password."""
+
+    id: UUID
+    name: str
+    email: str
+    phone_number: Optional[str] = None
+    date_of_birth: Optional[date] = None
+    age: Optional[int] = None
+    blood_group: Optional[str] = None
+
+
+class SignInResponse(UserProfile):
+    """Profile plus, when requested, a session token for /session/* endpoints."""
+
+    session_token: Optional[str] = None
+    expires_in: Optional[int] = None
+
+
+class AdminUser(UserProfile):
+    """One row of the admin user listing."""
+
+    created_ts: Optional[datetime] = None
+
+
+class AdminUserPage(BaseModel):
+    """A keyset-paginated page of the admin user listing."""
+
+    users: List[AdminUser]
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None
+
+
+class Activity(BaseModel):
+    """One activity log row."""
+
+    id: UUID
+    user_id: str
+    user_email: Optional[str] = None
+    action: str
+    endpoint: Optional[str] = None
+    timestamp: datetime
+    last_timestamp: Optional[datetime] = None
+    hit_count: Optional[int] = None
+    status: Optional[str] = None
+    details: Optional[str] = None
+
+
+class ActivityPage(BaseModel):
+    """A keyset-paginated page of activities, newest first."""
+
+    activities: List[Activity]
+    total: int
+    next_cursor: Optional[str] = None
+
+
+class AnalyticsResponse(BaseModel):
+    """Activity counts per bucket; each bucket also carries the `group_by` dimensions."""
+
+    granularity: str
+    group_by: List[str]
+    buckets: List[Dict[str, Any]]
@@ -22,6 +22,9 @@ class UserSignIn(BaseModel):
     email: EmailStr
     password: constr(min_length=6)
 
+    # Also return a short-lived session token for /session/* endpoints
+    issue_token: bool = False
+
 class UserUpdate(BaseModel):
     """Schema for editing/updating a user.
 
@@ -51,3 +54,32 @@ class UserProfileView(BaseModel):
 
     email: EmailStr
     password: constr(min_length=6)
+
+
+class UserSessionUpdate(BaseModel):
+    """Schema for updating the profile of the user holding a session token."""
+
+    name: Optional[constr(strip_whitespace=True, min_length=1)] = None
+    phone_number: Optional[str] = None
+    date_of_birth: Optional[date] = None
+    age: Optional[int] = None
+    blood_group: Optional[str] = None
+
+
+class UserImport(BaseModel):
+    """Schema for one record of a bulk user import.
+
+    Same fields as `UserCreate`, except the password may instead be given as
+    an existing bcrypt hash in `password_hash`; exactly one of the two is
+    required.
+    """
+
+    name: constr(strip_whitespace=True, min_length=1)
+    email: EmailStr
+    password: Optional[constr(min_length=6)] = None
+    password_hash: Optional[str] = None
+
+    phone_number: Optional[str] = None
+    date_of_birth: Optional[date] = None
+    age: Optional[int] = None
+    blood_group: Optional[str] = None
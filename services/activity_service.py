@@ -1,90 +1,88 @@
-from datetime import datetime
-from typing import Dict, Optional
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from uuid import UUID
 
+from fastapi import HTTPException, status as http_status
+from sqlalchemy import Select, select, tuple_
 from sqlalchemy.orm import Session
 
 from models.activity import UserActivity
+from schemas.activity import ActivityFilters, ActivityQuery
+from services.pagination import decode_cursor, encode_cursor
 
 
-def log_user_activity(
-    db: Session,
-    user_id: str,
-    action: str,
-    user_email: Optional[str] = None,
-    endpoint: Optional[str] = None,
-    ip_address: Optional[str] = None,
-    user_agent: Optional[str] = None,
-    status: str = "SUCCESS",
-    details: Optional[str] = None,
-) -> Dict:
-    """Log user activity to the database."""
-    activity = UserActivity(
-        user_id=user_id,
-        user_email=user_email,
-        action=action,
-        endpoint=endpoint,
-        ip_address=ip_address,
-        user_agent=user_agent,
-        timestamp=datetime.utcnow(),
-        status=status,
-        details=details,
-    )
-    
-    db.add(activity)
-    db.commit()
-    db.refresh(activity)
-    
+def _activity_to_dict(activity: UserActivity) -> Dict:
     return {
-        "id": str(activity.id),
+        "id": activity.id,
         "user_id": activity.user_id,
+        "user_email": activity.user_email,
         "action": activity.action,
-        "timestamp": activity.timestamp.isoformat(),
+        "endpoint": activity.endpoint,
+        "timestamp": activity.timestamp,
+        "last_timestamp": activity.last_timestamp,
+        "hit_count": activity.hit_count,
         "status": activity.status,
+        "details": activity.details,
     }
 
 
-def get_user_activities(db: Session, user_id: str, limit: int = 50) -> list:
-    """Get recent activities for a specific user."""
-    activities = (
-        db.query(UserActivity)
-        .filter(UserActivity.user_id == user_id)
-        .order_by(UserActivity.timestamp.desc())
-        .limit(limit)
-        .all()
-    )
-    
-    return [
-        {
-            "id": str(activity.id),
-            "action": activity.action,
-            "endpoint": activity.endpoint,
-            "timestamp": activity.timestamp.isoformat(),
-            "status": activity.status,
-            "details": activity.details,
-        }
-        for activity in activities
-    ]
-
-
-def get_all_activities(db: Session, limit: int = 100) -> list:
-    """Get all recent activities (for admin purposes)."""
-    activities = (
-        db.query(UserActivity)
-        .order_by(UserActivity.timestamp.desc())
-        .limit(limit)
-        .all()
+def _naive_utc(value: datetime) -> datetime:
+    """Timestamps are stored as naive UTC; normalise aware filter values."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _apply_activity_filters(query: Select, filters: ActivityFilters, user_id: Optional[str] = None) -> Select:
+    if user_id is not None:
+        query = query.where(UserActivity.user_id == user_id)
+    if filters.action is not None:
+        query = query.where(UserActivity.action == filters.action)
+    if filters.status is not None:
+        query = query.where(UserActivity.status == filters.status)
+    if filters.endpoint is not None:
+        query = query.where(UserActivity.endpoint == filters.endpoint)
+    if filters.start is not None:
+        query = query.where(UserActivity.timestamp >= _naive_utc(filters.start))
+    if filters.end is not None:
+        query = query.where(UserActivity.timestamp < _naive_utc(filters.end))
+    return query
+
+
+def _activities_page_query(filters: ActivityQuery, user_id: Optional[str] = None) -> Select:
+    """Filtered activity query, newest first, keyset-paginated on (timestamp, id)."""
+    query = _apply_activity_filters(select(UserActivity), filters, user_id)
+
+    if filters.cursor:
+        last_timestamp, last_id = decode_cursor(filters.cursor, 2)
+        try:
+            last_key = (datetime.fromisoformat(last_timestamp), UUID(last_id))
+        except (TypeError, ValueError, AttributeError):
+            raise HTTPException(
+                status_code=http_status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor",
+            )
+        query = query.where(tuple_(UserActivity.timestamp, UserActivity.id) < tuple_(*last_key))
+
+    return (
+        query
+        .order_by(UserActivity.timestamp.desc(), UserActivity.id.desc())
+        .limit(filters.limit + 1)
     )
-    
-    return [
-        {
-            "id": str(activity.id),
-            "user_id": activity.user_id,
-            "user_email": activity.user_email,
-            "action": activity.action,
-            "endpoint": activity.endpoint,
-            "timestamp": activity.timestamp.isoformat(),
-            "status": activity.status,
-            "details": activity.details,
-        }
-        for activity in activities
-    ]
+
+
+def _activities_page(activities: List[UserActivity], limit: int) -> Dict:
+    has_more = len(activities) > limit
+    activities = activities[:limit]
+    last = activities[-1] if activities else None
+    return {
+        "activities": [_activity_to_dict(activity) for activity in activities],
+        "total": len(activities),
+        "next_cursor": encode_cursor(last.timestamp.isoformat(), last.id) if has_more else None,
+    }
+
+
+def query_activities(db: Session, filters: ActivityQuery, user_id: Optional[str] = None) -> Dict:
+    """Return one page of activities matching `filters`, newest first."""
+    activities = db.scalars(_activities_page_query(filters, user_id)).all()
+    return _activities_page(activities, filters.limit)
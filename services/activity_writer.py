@@ -0,0 +1,301 @@
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from anyio import to_thread
+from sqlalchemy import insert
+
+from database.db import SessionLocal
+from database.ids import uuid7
+from models.activity import UserActivity
+from services.analytics_service import upsert_rollups
+
+logger = logging.getLogger(__name__)
+
+# Activity writer configuration
+ACTIVITY_QUEUE_SIZE = int(os.getenv("ACTIVITY_QUEUE_SIZE", "10000"))
+ACTIVITY_BATCH_SIZE = int(os.getenv("ACTIVITY_BATCH_SIZE", "500"))
+ACTIVITY_FLUSH_INTERVAL = float(os.getenv("ACTIVITY_FLUSH_INTERVAL", "1.0"))
+ACTIVITY_QUEUE_POLICY = os.getenv("ACTIVITY_QUEUE_POLICY", "block")  # block, drop, sample
+ACTIVITY_BLOCK_TIMEOUT = float(os.getenv("ACTIVITY_BLOCK_TIMEOUT", "0.5"))
+ACTIVITY_SAMPLE_THRESHOLD = float(os.getenv("ACTIVITY_SAMPLE_THRESHOLD", "0.8"))
+ACTIVITY_SAMPLE_RATE = float(os.getenv("ACTIVITY_SAMPLE_RATE", "0.1"))
+ACTIVITY_COALESCE_WINDOW = float(os.getenv("ACTIVITY_COALESCE_WINDOW", "0"))  # seconds, 0 disables
+ACTIVITY_COALESCE_MAX_KEYS = int(os.getenv("ACTIVITY_COALESCE_MAX_KEYS", "10000"))
+
+QUEUE_POLICIES = {"block", "drop", "sample"}
+
+
+class ActivityWriter:
+    """Background writer that batches activity rows into multi-row inserts.
+
+    Requests put records on a bounded queue; a worker thread flushes them once
+    `batch_size` rows are pending or `flush_interval` seconds have passed,
+    updating the analytics rollups in the same transaction.
+    When the queue is full the `policy` decides what happens:
+
+    - ``block``: wait up to `block_timeout` seconds for room, then drop.
+    - ``drop``: drop the record immediately.
+    - ``sample``: above `sample_threshold` occupancy, keep only a
+      `sample_rate` fraction of successful events; failures are always kept
+      while there is room.
+
+    With a `coalesce_window`, successful ``API_ACCESS`` events sharing user,
+    endpoint, IP and status are merged in memory for that many seconds and
+    written as one row carrying `hit_count` and first/last timestamps.
+    Failures and other actions are always written individually.
+    """
+
+    def __init__(
+        self,
+        max_size: int = ACTIVITY_QUEUE_SIZE,
+        batch_size: int = ACTIVITY_BATCH_SIZE,
+        flush_interval: float = ACTIVITY_FLUSH_INTERVAL,
+        policy: str = ACTIVITY_QUEUE_POLICY,
+        block_timeout: float = ACTIVITY_BLOCK_TIMEOUT,
+        sample_threshold: float = ACTIVITY_SAMPLE_THRESHOLD,
+        sample_rate: float = ACTIVITY_SAMPLE_RATE,
+        coalesce_window: float = ACTIVITY_COALESCE_WINDOW,
+        coalesce_max_keys: int = ACTIVITY_COALESCE_MAX_KEYS,
+    ) -> None:
+        if policy not in QUEUE_POLICIES:
+            raise ValueError(f"Unknown activity queue policy: {policy}")
+
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.sample_threshold = sample_threshold
+        self.sample_rate = sample_rate
+        self.coalesce_window = coalesce_window
+        self.coalesce_max_keys = coalesce_max_keys
+
+        self._queue: "queue.Queue[Dict]" = queue.Queue(maxsize=max_size)
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._coalesced: Dict[Tuple, Dict] = {}
+        self._coalesce_lock = threading.Lock()
+        self._metrics_lock = threading.Lock()
+
+        self.enqueued = 0
+        self.dropped = 0
+        self.sampled_out = 0
+        self.coalesced_hits = 0
+        self.written = 0
+        self.failed = 0
+        self.flushes = 0
+        self.last_flush_seconds = 0.0
+
+    def start(self) -> None:
+        """Start the flush worker if it is not running yet."""
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="activity-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Flush every pending record and stop the worker."""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def submit(
+        self,
+        user_id: str,
+        action: str,
+        user_email: Optional[str] = None,
+        endpoint: Optional[str] = None,
+        ip_address: Optional[str] = None,
+        user_agent: Optional[str] = None,
+        status: str = "SUCCESS",
+        details: Optional[str] = None,
+    ) -> bool:
+        """Queue one activity record. Returns False if it was dropped."""
+        record = self._prepare(user_id, action, user_email, endpoint, ip_address, user_agent, status, details)
+        if record is None:
+            return True
+        return self._enqueue(record)
+
+    async def submit_async(self, **fields) -> bool:
+        """Queue a record from async code without blocking the event loop.
+
+        The put is tried on the loop; only a ``block`` policy wait for room
+        in a full queue moves to a worker thread.
+        """
+        record = self._prepare(**fields)
+        if record is None:
+            return True
+        if self.policy != "block":
+            return self._enqueue(record)
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            return await to_thread.run_sync(self._enqueue, record)
+        self._count("enqueued")
+        return True
+
+    def _prepare(
+        self,
+        user_id: str,
+        action: str,
+        user_email: Optional[str] = None,
+        endpoint: Optional[str] = None,
+        ip_address: Optional[str] = None,
+        user_agent: Optional[str] = None,
+        status: str = "SUCCESS",
+        details: Optional[str] = None,
+    ) -> Optional[Dict]:
+        """Build the record, or return None once it is merged into a counter."""
+        if self._thread is None:
+            self.start()
+
+        now = datetime.utcnow()
+        record = {
+            # Generated from the same clock reading so id order matches timestamp order
+            "id": uuid7(now),
+            "user_id": user_id,
+            "user_email": user_email,
+            "action": action,
+            "endpoint": endpoint,
+            "ip_address": ip_address,
+            "user_agent": user_agent,
+            "timestamp": now,
+            "last_timestamp": now,
+            "hit_count": 1,
+            "status": status,
+            "details": details,
+        }
+
+        if self.coalesce_window > 0 and action == "API_ACCESS" and status == "SUCCESS":
+            if self._coalesce(record):
+                return None
+        return record
+
+    def _count(self, counter: str, amount: int = 1) -> None:
+        with self._metrics_lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    def _coalesce(self, record: Dict) -> bool:
+        """Merge `record` into a pending windowed counter if possible."""
+        key = (record["user_id"], record["endpoint"], record["ip_address"], record["status"])
+        with self._coalesce_lock:
+            pending = self._coalesced.get(key)
+            if pending is not None:
+                pending["hit_count"] += 1
+                pending["last_timestamp"] = record["timestamp"]
+                self.coalesced_hits += 1
+                return True
+            if len(self._coalesced) >= self.coalesce_max_keys:
+                return False
+            self._coalesced[key] = record
+            return True
+
+    def _take_coalesced(self, force: bool = False) -> List[Dict]:
+        """Remove and return the counters whose window has closed."""
+        cutoff = datetime.utcnow() - timedelta(seconds=self.coalesce_window)
+        with self._coalesce_lock:
+            expired = [key for key, record in self._coalesced.items() if force or record["timestamp"] <= cutoff]
+            return [self._coalesced.pop(key) for key in expired]
+
+    def _enqueue(self, record: Dict) -> bool:
+        if self.policy == "sample" and record["status"] == "SUCCESS" and self._over_threshold():
+            if random.random() >= self.sample_rate:
+                self._count("sampled_out")
+                return False
+
+        try:
+            if self.policy == "block":
+                self._queue.put(record, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(record)
+        except queue.Full:
+            self._count("dropped")
+            return False
+
+        self._count("enqueued")
+        return True
+
+    def _over_threshold(self) -> bool:
+        return self._queue.qsize() >= self.max_size * self.sample_threshold
+
+    def _collect(self) -> List[Dict]:
+        stopping = self._stopping.is_set()
+        try:
+            if stopping:
+                first = self._queue.get_nowait()
+            else:
+                first = self._queue.get(timeout=self.flush_interval)
+        except queue.Empty:
+            return []
+
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if stopping or remaining <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _flush(self, batch: List[Dict]) -> None:
+        started = time.monotonic()
+        db = SessionLocal()
+        try:
+            db.execute(insert(UserActivity), batch)
+            upsert_rollups(db, batch)
+            db.commit()
+            self._count("written", len(batch))
+        except Exception:
+            db.rollback()
+            self._count("failed", len(batch))
+            logger.exception("Failed to write %d activity records", len(batch))
+        finally:
+            db.close()
+        self.flushes += 1
+        self.last_flush_seconds = time.monotonic() - started
+
+    def _run(self) -> None:
+        while True:
+            if self._coalesced:
+                # Closed windows skip the queue: the worker is its only consumer.
+                released = self._take_coalesced(force=self._stopping.is_set())
+                for start in range(0, len(released), self.batch_size):
+                    self._flush(released[start:start + self.batch_size])
+            batch = self._collect()
+            if batch:
+                self._flush(batch)
+            elif self._stopping.is_set() and not self._coalesced:
+                break
+
+    def stats(self) -> Dict:
+        return {
+            "policy": self.policy,
+            "queue_depth": self._queue.qsize(),
+            "queue_capacity": self.max_size,
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+            "sampled_out": self.sampled_out,
+            "coalesced_hits": self.coalesced_hits,
+            "coalescing_keys": len(self._coalesced),
+            "written": self.written,
+            "failed": self.failed,
+            "flushes": self.flushes,
+            "last_flush_seconds": self.last_flush_seconds,
+        }
+
+
+activity_writer = ActivityWriter()
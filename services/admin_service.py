@@ -0,0 +1,84 @@
+import os
+from typing import Dict, Iterator, Optional
+from uuid import UUID
+
+from fastapi import HTTPException, status
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from database.replicas import read_session
+from models.user import User
+from services.pagination import decode_cursor, encode_cursor
+from services.serialization import dumps
+
+ADMIN_USERS_STREAM_BATCH = int(os.getenv("ADMIN_USERS_STREAM_BATCH", "1000"))
+
+# Everything the admin listing shows; the password hash is never loaded.
+_LISTING_COLUMNS = (
+    User.id,
+    User.name,
+    User.email,
+    User.phone_number,
+    User.date_of_birth,
+    User.age,
+    User.blood_group,
+    User.created_ts,
+)
+
+
+def _admin_user_to_dict(user) -> Dict:
+    return {
+        "id": user.id,
+        "name": user.name,
+        "email": user.email,
+        "phone_number": user.phone_number,
+        "date_of_birth": user.date_of_birth,
+        "age": user.age,
+        "blood_group": user.blood_group,
+        "created_ts": user.created_ts,
+    }
+
+
+def _listing_query():
+    # Plain column rows: no identity map or ORM state per streamed row.
+    return select(*_LISTING_COLUMNS).order_by(User.id)
+
+
+def list_users(db: Session, limit: int = 100, cursor: Optional[str] = None, include_total: bool = False) -> Dict:
+    """Return one keyset-paginated page of users ordered by id."""
+    query = _listing_query()
+    if cursor:
+        try:
+            last_id = UUID(decode_cursor(cursor, 1)[0])
+        except (TypeError, ValueError, AttributeError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor",
+            )
+        query = query.where(User.id > last_id)
+
+    # Fetch one extra row to know whether another page exists.
+    users = db.execute(query.limit(limit + 1)).all()
+    has_more = len(users) > limit
+    users = users[:limit]
+
+    return {
+        "users": [_admin_user_to_dict(user) for user in users],
+        "next_cursor": encode_cursor(users[-1].id) if has_more else None,
+        "total": db.scalar(select(func.count()).select_from(User)) if include_total else None,
+    }
+
+
+def iter_users_ndjson(batch_size: int = ADMIN_USERS_STREAM_BATCH) -> Iterator[str]:
+    """Stream every user as NDJSON using a server-side cursor.
+
+    The generator owns its session because it outlives the request's
+    dependencies; at most `batch_size` rows are held in memory at a time.
+    """
+    db = read_session()
+    try:
+        result = db.execute(_listing_query().execution_options(yield_per=batch_size))
+        for users in result.partitions():
+            yield b"".join(dumps(_admin_user_to_dict(user)) + b"\n" for user in users)
+    finally:
+        db.close()
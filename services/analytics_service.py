@@ -0,0 +1,152 @@
+import os
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from fastapi import HTTPException, status as http_status
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from models.activity import UserActivityRollup
+from services.activity_service import _naive_utc
+
+# Rollup retention per granularity, in days (0 keeps buckets forever)
+ROLLUP_RETENTION_DAYS = {
+    "minute": int(os.getenv("ROLLUP_MINUTE_RETENTION_DAYS", "7")),
+    "hour": int(os.getenv("ROLLUP_HOUR_RETENTION_DAYS", "180")),
+    "day": int(os.getenv("ROLLUP_DAY_RETENTION_DAYS", "0")),
+}
+
+GRANULARITIES = ("minute", "hour", "day")
+DIMENSIONS = ("action", "status", "endpoint")
+
+
+def _truncate(timestamp: datetime, granularity: str) -> datetime:
+    if granularity == "minute":
+        return timestamp.replace(second=0, microsecond=0)
+    if granularity == "hour":
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def rollup_rows(records: Iterable[Dict]) -> List[Dict]:
+    """Aggregate activity records into one row per bucket and dimension set."""
+    counts: Counter = Counter()
+    for record in records:
+        for granularity in GRANULARITIES:
+            key = (
+                granularity,
+                _truncate(record["timestamp"], granularity),
+                record["action"],
+                record["status"],
+                record.get("endpoint") or "",
+            )
+            counts[key] += record.get("hit_count", 1)
+
+    # Sorted so concurrent writers lock rollup rows in the same order.
+    return [
+        {
+            "granularity": granularity,
+            "bucket": bucket,
+            "action": action,
+            "status": status,
+            "endpoint": endpoint,
+            "count": count,
+        }
+        for (granularity, bucket, action, status, endpoint), count in sorted(counts.items())
+    ]
+
+
+def upsert_rollups(db: Session, records: Sequence[Dict]) -> None:
+    """Add a batch of activity records to the rollup counters.
+
+    Runs in the caller's transaction so rollups commit together with the
+    activity rows they count.
+    """
+    rows = rollup_rows(records)
+    if not rows:
+        return
+
+    statement = insert(UserActivityRollup).values(rows)
+    db.execute(statement.on_conflict_do_update(
+        index_elements=["granularity", "bucket", "action", "status", "endpoint"],
+        set_={"count": UserActivityRollup.count + statement.excluded.count},
+    ))
+
+
+def prune_rollups(conn: Connection, now: datetime) -> None:
+    """Drop buckets older than their granularity's retention."""
+    for granularity, days in ROLLUP_RETENTION_DAYS.items():
+        if days <= 0:
+            continue
+        conn.execute(
+            text("DELETE FROM user_activity_rollup WHERE granularity = :granularity AND bucket < :cutoff"),
+            {"granularity": granularity, "cutoff": now - timedelta(days=days)},
+        )
+
+
+def query_analytics(
+    db: Session,
+    granularity: str,
+    start: datetime,
+    end: datetime,
+    group_by: Sequence[str] = (),
+    action: Optional[str] = None,
+    status: Optional[str] = None,
+) -> Dict:
+    """Return activity counts per bucket over [start, end), grouped by `group_by`."""
+    if granularity not in GRANULARITIES:
+        raise HTTPException(
+            status_code=http_status.HTTP_400_BAD_REQUEST,
+            detail=f"granularity must be one of {', '.join(GRANULARITIES)}",
+        )
+    unknown = [name for name in group_by if name not in DIMENSIONS]
+    if unknown:
+        raise HTTPException(
+            status_code=http_status.HTTP_400_BAD_REQUEST,
+            detail=f"Cannot group by {', '.join(unknown)}",
+        )
+
+    dimensions = [getattr(UserActivityRollup, name) for name in group_by]
+    query = (
+        select(UserActivityRollup.bucket, *dimensions, func.sum(UserActivityRollup.count).label("count"))
+        .where(
+            UserActivityRollup.granularity == granularity,
+            UserActivityRollup.bucket >= _naive_utc(start),
+            UserActivityRollup.bucket < _naive_utc(end),
+        )
+        .group_by(UserActivityRollup.bucket, *dimensions)
+        .order_by(UserActivityRollup.bucket, *dimensions)
+    )
+    if action is not None:
+        query = query.where(UserActivityRollup.action == action)
+    if status is not None:
+        query = query.where(UserActivityRollup.status == status)
+
+    buckets = []
+    for row in db.execute(query):
+        bucket = {"bucket": row.bucket, "count": int(row.count)}
+        for name in group_by:
+            bucket[name] = getattr(row, name)
+        buckets.append(bucket)
+
+    return {"granularity": granularity, "group_by": list(group_by), "buckets": buckets}
+
+
+def backfill_rollups(conn: Connection, start: datetime, end: datetime) -> None:
+    """Build rollups for existing user_activity rows in [start, end).
+
+    Meant for a one-off run over history recorded before rollups existed;
+    running it twice over the same range double counts.
+    """
+    for granularity in GRANULARITIES:
+        conn.execute(text(
+            "INSERT INTO user_activity_rollup (granularity, bucket, action, status, endpoint, count) "
+            "SELECT :granularity, date_trunc(:granularity, timestamp), action, status, "
+            "COALESCE(endpoint, ''), SUM(hit_count) FROM user_activity "
+            "WHERE timestamp >= :start AND timestamp < :end GROUP BY 2, 3, 4, 5 "
+            "ON CONFLICT (granularity, bucket, action, status, endpoint) "
+            "DO UPDATE SET count = user_activity_rollup.count + EXCLUDED.count"
+        ), {"granularity": granularity, "start": start, "end": end})
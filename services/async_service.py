@@ -0,0 +1,160 @@
+from typing import Callable, Dict, Optional
+
+from anyio import to_thread
+from fastapi import HTTPException, status
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from schemas.activity import ActivityQuery
+from schemas.user import (
+    UserChangePassword,
+    UserCreate,
+    UserProfileView,
+    UserSessionUpdate,
+    UserSignIn,
+    UserUpdate,
+)
+from services.activity_service import _activities_page, _activities_page_query
+from services.password_hasher import password_hasher
+from services.service import (
+    _credentials_query,
+    _email_taken,
+    _invalid_credentials,
+    _password_change_statement,
+    _profile_update_statement,
+    _session_revoked,
+    _session_profile_query,
+    _session_update_statement,
+    _signin_response,
+    _signup_statement,
+    _user_to_dict,
+)
+from services.user_cache import user_cache
+
+# Async counterparts of services/service.py, used when DB_ASYNC is enabled.
+# bcrypt runs on the password hashing pool so it never holds the event loop.
+
+
+async def _cache(fn: Callable, *args):
+    # Remote cache backends block on network I/O; keep them off the loop.
+    if user_cache.remote:
+        return await to_thread.run_sync(fn, *args)
+    return fn(*args)
+
+
+async def _invalidate(user) -> None:
+    await _cache(lambda: user_cache.invalidate(emails=[user.email]))
+
+
+async def _load_user_by_email(db: AsyncSession, email: str):
+    found, user = await _cache(user_cache.get_by_email, email)
+    if not found:
+        user = (await db.execute(_credentials_query(email))).first()
+        if user is None:
+            await _cache(user_cache.put_missing, email)
+        else:
+            await _cache(user_cache.put, user)
+    return user
+
+
+async def _authenticate(db: AsyncSession, email: str, password: str):
+    user = await _load_user_by_email(db, email)
+    if not user or not await password_hasher.verify_async(password, user.password):
+        raise _invalid_credentials()
+    return user
+
+
+async def signin_user(payload: UserSignIn, db: AsyncSession) -> Dict:
+    """Handle user signin logic: validate credentials and return user profile data."""
+    user = await _authenticate(db, payload.email, payload.password)
+    return _signin_response(user, payload.issue_token)
+
+
+async def health_check(db: AsyncSession) -> Dict:
+    """Simple health check to verify database connection."""
+    try:
+        await db.execute(text("SELECT 1"))
+        return {"status": "ok", "database": "connected"}
+    except Exception as exc:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Database connection error: {exc}",
+        )
+
+
+async def signup_user(payload: UserCreate, db: AsyncSession) -> Dict:
+    """Handle user signup: hash password and insert unless the email is taken."""
+    password_hash = await password_hasher.hash_async(payload.password)
+    user = (await db.execute(_signup_statement(payload, password_hash))).first()
+    if user is None:
+        await db.rollback()
+        await _cache(lambda: user_cache.invalidate(emails=[payload.email]))
+        raise _email_taken()
+
+    await db.commit()
+    # Drop any cached "no such email" entry.
+    await _cache(lambda: user_cache.invalidate(emails=[payload.email]))
+    return _user_to_dict(user)
+
+
+async def update_user(payload: UserUpdate, db: AsyncSession) -> Dict:
+    """Update basic profile fields for a user authenticated by email+password."""
+    user = await _authenticate(db, payload.email, payload.password)
+
+    updated = (await db.execute(_profile_update_statement(payload, user))).first()
+    await _invalidate(user)
+    if updated is None:
+        await db.rollback()
+        raise _invalid_credentials()
+
+    await db.commit()
+    await _invalidate(updated)
+    return _user_to_dict(updated)
+
+
+async def change_password(payload: UserChangePassword, db: AsyncSession) -> Dict:
+    """Change a user's password after verifying current password."""
+    user = await _authenticate(db, payload.email, payload.current_password)
+
+    password_hash = await password_hasher.hash_async(payload.new_password)
+    updated = (await db.execute(_password_change_statement(user, password_hash))).first()
+    await _invalidate(user)
+    if updated is None:
+        await db.rollback()
+        raise _invalid_credentials()
+
+    await db.commit()
+    await _invalidate(updated)
+    return _user_to_dict(updated)
+
+
+async def view_profile(payload: UserProfileView, db: AsyncSession) -> Dict:
+    """Return a user's profile after verifying email+password."""
+    user = await _authenticate(db, payload.email, payload.password)
+    return _user_to_dict(user)
+
+
+async def view_profile_by_session(claims: Dict, db: AsyncSession) -> Dict:
+    """Return the profile of the user holding a verified session token."""
+    user = (await db.execute(_session_profile_query(claims))).first()
+    if user is None:
+        raise _session_revoked()
+    return _user_to_dict(user)
+
+
+async def update_user_by_session(payload: UserSessionUpdate, claims: Dict, db: AsyncSession) -> Dict:
+    """Update profile fields for the user holding a verified session token."""
+    user = (await db.execute(_session_update_statement(payload, claims))).first()
+    if user is None:
+        await db.rollback()
+        raise _session_revoked()
+
+    await db.commit()
+    await _invalidate(user)
+    return _user_to_dict(user)
+
+
+async def query_activities(db: AsyncSession, filters: ActivityQuery, user_id: Optional[str] = None) -> Dict:
+    """Return one page of activities matching `filters`, newest first."""
+    activities = (await db.scalars(_activities_page_query(filters, user_id))).all()
+    return _activities_page(activities, filters.limit)
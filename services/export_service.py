@@ -0,0 +1,127 @@
+import csv
+import io
+import json
+import os
+import zlib
+from typing import Iterator, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import select
+
+from database.replicas import read_session
+from models.activity import UserActivity
+from schemas.activity import ActivityFilters
+from services.activity_service import _apply_activity_filters
+
+# Rows fetched per server-side cursor round trip
+ACTIVITY_EXPORT_BATCH = int(os.getenv("ACTIVITY_EXPORT_BATCH", "5000"))
+ACTIVITY_EXPORT_GZIP_LEVEL = int(os.getenv("ACTIVITY_EXPORT_GZIP_LEVEL", "6"))
+
+EXPORT_FORMATS = ("csv", "ndjson")
+
+_EXPORT_COLUMNS = (
+    UserActivity.id,
+    UserActivity.timestamp,
+    UserActivity.last_timestamp,
+    UserActivity.user_id,
+    UserActivity.user_email,
+    UserActivity.action,
+    UserActivity.endpoint,
+    UserActivity.status,
+    UserActivity.hit_count,
+    UserActivity.ip_address,
+    UserActivity.user_agent,
+    UserActivity.details,
+)
+_FIELDS = [column.key for column in _EXPORT_COLUMNS]
+
+
+def _export_value(value):
+    if value is None or isinstance(value, (str, int)):
+        return value
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+def _encode_csv(rows, header: bool) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(_FIELDS)
+    for row in rows:
+        writer.writerow([_export_value(value) for value in row])
+    return buffer.getvalue()
+
+
+def _encode_ndjson(rows) -> str:
+    return "".join(
+        json.dumps(dict(zip(_FIELDS, (_export_value(value) for value in row)))) + "\n"
+        for row in rows
+    )
+
+
+def export_media_type(fmt: str, compress: bool) -> str:
+    if compress:
+        return "application/gzip"
+    return "text/csv" if fmt == "csv" else "application/x-ndjson"
+
+
+def export_filename(fmt: str, compress: bool) -> str:
+    return f"activities.{fmt}" + (".gz" if compress else "")
+
+
+def _stream(query, fmt: str, compress: bool, batch_size: int) -> Iterator[bytes]:
+    # wbits=31 writes a gzip header and trailer around the deflate stream.
+    compressor = zlib.compressobj(ACTIVITY_EXPORT_GZIP_LEVEL, zlib.DEFLATED, 31) if compress else None
+
+    def emit(text: str) -> bytes:
+        data = text.encode()
+        return compressor.compress(data) if compressor is not None else data
+
+    db = read_session()
+    try:
+        chunks = []
+        if fmt == "csv":
+            chunks.append(emit(_encode_csv((), header=True)))
+        result = db.execute(query.execution_options(yield_per=batch_size))
+        for rows in result.partitions():
+            chunks.append(emit(_encode_csv(rows, header=False) if fmt == "csv" else _encode_ndjson(rows)))
+            # The compressor buffers internally and may return nothing yet.
+            data = b"".join(chunks)
+            chunks = []
+            if data:
+                yield data
+        if compressor is not None:
+            chunks.append(compressor.flush())
+        data = b"".join(chunks)
+        if data:
+            yield data
+    finally:
+        db.close()
+
+
+def iter_activity_export(
+    filters: ActivityFilters,
+    user_id: Optional[str] = None,
+    fmt: str = "ndjson",
+    compress: bool = False,
+    batch_size: int = ACTIVITY_EXPORT_BATCH,
+) -> Iterator[bytes]:
+    """Stream matching activity rows, oldest first, as CSV or NDJSON bytes.
+
+    Rows come from a server-side cursor `batch_size` at a time and each batch
+    is encoded (and gzip-compressed, when `compress` is set) before the next
+    is fetched, so memory stays bounded however large the export is. The
+    stream owns its session because it outlives the request's dependencies.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"format must be one of {', '.join(EXPORT_FORMATS)}",
+        )
+
+    query = _apply_activity_filters(select(*_EXPORT_COLUMNS), filters, user_id).order_by(
+        UserActivity.timestamp, UserActivity.id
+    )
+    return _stream(query, fmt, compress, batch_size)
@@ -0,0 +1,194 @@
+import csv
+import io
+import json
+import os
+import re
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from database.ids import uuid7
+from schemas.user import UserImport
+from services.password_hasher import password_hasher
+from services.user_cache import user_cache
+
+# Records validated, hashed and loaded per transaction
+USER_IMPORT_CHUNK_SIZE = int(os.getenv("USER_IMPORT_CHUNK_SIZE", "1000"))
+
+IMPORT_FORMATS = ("csv", "ndjson")
+
+_BCRYPT_HASH = re.compile(r"^\$2[aby]\$\d{2}\$[./A-Za-z0-9]{53}$")
+
+# bcrypt only reads this many bytes; bcrypt 5 raises rather than truncating.
+_BCRYPT_MAX_PASSWORD_BYTES = 72
+
+_STAGING_COLUMNS = (
+    "line",
+    "id",
+    "name",
+    "email",
+    "password",
+    "phone_number",
+    "date_of_birth",
+    "age",
+    "blood_group",
+)
+
+_CREATE_STAGING = text(
+    "CREATE TEMP TABLE user_import_staging ("
+    "line integer, id uuid, name text, email text, password text, "
+    "phone_number text, date_of_birth date, age integer, blood_group text"
+    ") ON COMMIT DROP"
+)
+
+_COPY_STAGING = f"COPY user_import_staging ({', '.join(_STAGING_COLUMNS)}) FROM STDIN WITH (FORMAT csv)"
+
+_MERGE_STAGING = text(
+    "INSERT INTO user_data "
+    "(id, name, email, password, session_version, phone_number, date_of_birth, age, blood_group) "
+    "SELECT id, name, email, password, 0, phone_number, date_of_birth, age, blood_group "
+    "FROM user_import_staging ORDER BY line "
+    "ON CONFLICT (email) DO NOTHING RETURNING email"
+)
+
+
+def _read_records(stream: Iterable[str], fmt: str) -> Iterator[Tuple[int, Optional[Dict], Optional[str]]]:
+    """Yield `(line, record, error)` for every record in a CSV or NDJSON stream."""
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            # Empty cells mean "not provided", like a missing JSON key.
+            yield reader.line_num, {key: value or None for key, value in row.items() if key}, None
+        return
+
+    for line, raw in enumerate(stream, start=1):
+        if not raw.strip():
+            continue
+        try:
+            record = json.loads(raw)
+        except ValueError:
+            yield line, None, "Invalid JSON"
+            continue
+        if not isinstance(record, dict):
+            yield line, None, "Expected a JSON object"
+            continue
+        yield line, record, None
+
+
+def _validate(record: Dict) -> Tuple[Optional[UserImport], Optional[str]]:
+    try:
+        user = UserImport(**record)
+    except ValidationError as exc:
+        return None, "; ".join(
+            f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in exc.errors()
+        )
+
+    if (user.password is None) == (user.password_hash is None):
+        return None, "Provide exactly one of password or password_hash"
+    if user.password_hash is not None and not _BCRYPT_HASH.match(user.password_hash):
+        return None, "password_hash is not a bcrypt hash"
+    if user.password is not None and len(user.password.encode()) > _BCRYPT_MAX_PASSWORD_BYTES:
+        return None, f"password is longer than {_BCRYPT_MAX_PASSWORD_BYTES} bytes"
+    return user, None
+
+
+def _fail(report: Dict, line: int, email: Optional[str], error: str) -> None:
+    report["failed"] += 1
+    report["errors"].append({"line": line, "email": email, "error": error})
+
+
+def _staging_csv(chunk: List[Tuple[int, UserImport]]) -> io.StringIO:
+    plain = [user.password for _, user in chunk if user.password_hash is None]
+    hashes = iter(password_hasher.hash_many(plain))
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for line, user in chunk:
+        writer.writerow([
+            line,
+            uuid7(),
+            user.name,
+            user.email,
+            user.password_hash or next(hashes),
+            user.phone_number,
+            user.date_of_birth,
+            user.age,
+            user.blood_group,
+        ])
+    buffer.seek(0)
+    return buffer
+
+
+def _load_chunk(db: Session, chunk: List[Tuple[int, UserImport]], report: Dict) -> None:
+    """COPY one chunk into a staging table and merge it into user_data."""
+    buffer = _staging_csv(chunk)
+    try:
+        db.execute(_CREATE_STAGING)
+        with db.connection().connection.cursor() as cursor:
+            cursor.copy_expert(_COPY_STAGING, buffer)
+        inserted = set(db.execute(_MERGE_STAGING).scalars())
+        db.commit()
+    except DBAPIError as exc:
+        db.rollback()
+        message = f"Chunk rejected by database: {str(exc.orig).strip()}"
+        for line, user in chunk:
+            _fail(report, line, user.email, message)
+        return
+
+    # Drop cached "no such email" entries for the new accounts.
+    user_cache.invalidate(emails=inserted)
+    report["imported"] += len(inserted)
+    for line, user in chunk:
+        if user.email not in inserted:
+            _fail(report, line, user.email, "Email already registered")
+
+
+def import_users(
+    db: Session,
+    stream: Iterable[str],
+    fmt: str,
+    chunk_size: int = USER_IMPORT_CHUNK_SIZE,
+) -> Dict:
+    """Bulk-create users from a CSV or NDJSON stream of `UserImport` records.
+
+    Records are validated as they are read and loaded `chunk_size` at a time:
+    plain passwords are hashed across the whole hashing pool, the chunk is
+    COPYed into a temporary staging table and merged with one
+    `INSERT ... ON CONFLICT (email) DO NOTHING`. Each chunk commits on its own,
+    so a failure part-way keeps the chunks before it. Returns counts and one
+    error entry per rejected record.
+    """
+    if fmt not in IMPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"format must be one of {', '.join(IMPORT_FORMATS)}",
+        )
+
+    report = {"received": 0, "imported": 0, "failed": 0, "errors": []}
+    seen_emails = set()
+    chunk: List[Tuple[int, UserImport]] = []
+
+    for line, record, error in _read_records(stream, fmt):
+        report["received"] += 1
+        user = None
+        if error is None:
+            user, error = _validate(record)
+        if error is None and user.email in seen_emails:
+            error = "Duplicate email in import"
+        if error is not None:
+            _fail(report, line, (record or {}).get("email"), error)
+            continue
+
+        seen_emails.add(user.email)
+        chunk.append((line, user))
+        if len(chunk) >= chunk_size:
+            _load_chunk(db, chunk, report)
+            chunk = []
+
+    if chunk:
+        _load_chunk(db, chunk, report)
+    return report
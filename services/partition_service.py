@@ -0,0 +1,201 @@
+import logging
+import os
+import re
+import threading
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import DBAPIError
+
+from database.db import get_engine
+from services.analytics_service import prune_rollups
+
+logger = logging.getLogger(__name__)
+
+# Partition maintenance configuration
+ACTIVITY_PARTITIONS_AHEAD = int(os.getenv("ACTIVITY_PARTITIONS_AHEAD", "7"))
+ACTIVITY_RETENTION_DAYS = int(os.getenv("ACTIVITY_RETENTION_DAYS", "90"))
+ACTIVITY_MAINTENANCE_INTERVAL = float(os.getenv("ACTIVITY_MAINTENANCE_INTERVAL", "3600"))
+ACTIVITY_PARTITION_MAINTENANCE = os.getenv("ACTIVITY_PARTITION_MAINTENANCE", "true").lower() in ("1", "true", "yes")
+
+# Only one worker process runs maintenance at a time.
+MAINTENANCE_LOCK_KEY = 0x75615F7061727473
+
+PARENT_TABLE = "user_activity"
+DEFAULT_PARTITION = f"{PARENT_TABLE}_default"
+_PARTITION_NAME = re.compile(rf"^{PARENT_TABLE}_p(\d{{8}})$")
+
+
+def partition_name(day: date) -> str:
+    return f"{PARENT_TABLE}_p{day:%Y%m%d}"
+
+
+def list_partitions(conn: Connection) -> Dict[date, str]:
+    """Return the daily partitions currently attached to user_activity."""
+    rows = conn.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE parent.relname = :parent"
+    ), {"parent": PARENT_TABLE})
+
+    partitions = {}
+    for (name,) in rows:
+        match = _PARTITION_NAME.match(name)
+        if match:
+            partitions[datetime.strptime(match.group(1), "%Y%m%d").date()] = name
+    return partitions
+
+
+def _move_out_of_default(conn: Connection, name: str, bounds: Dict[str, date]) -> None:
+    """Create `name` as a plain table holding the default partition's rows in `bounds`.
+
+    A partition cannot be created over a range the default partition already
+    has rows for, so those rows are moved into the new table before it is
+    attached.
+    """
+    conn.execute(text(f"CREATE TABLE {name} (LIKE {PARENT_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    conn.execute(text(
+        f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE timestamp >= :start AND timestamp < :end RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved"
+    ), bounds)
+
+
+def ensure_partitions(conn: Connection, today: date, ahead: int = ACTIVITY_PARTITIONS_AHEAD) -> List[str]:
+    """Create the partitions for today and the next `ahead` days if missing.
+
+    Each day is created in its own savepoint, so a day that cannot be created
+    is logged and retried on the next run without holding back the others.
+    """
+    conn.execute(text(f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {PARENT_TABLE} DEFAULT"))
+
+    existing = list_partitions(conn)
+    created = []
+    for offset in range(ahead + 1):
+        day = today + timedelta(days=offset)
+        if day in existing:
+            continue
+        name = partition_name(day)
+        bounds = {"start": day, "end": day + timedelta(days=1)}
+        range_sql = f"FOR VALUES FROM ('{bounds['start'].isoformat()}') TO ('{bounds['end'].isoformat()}')"
+        try:
+            with conn.begin_nested():
+                in_default = conn.execute(text(
+                    f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE timestamp >= :start AND timestamp < :end)"
+                ), bounds).scalar()
+                if in_default:
+                    _move_out_of_default(conn, name, bounds)
+                    conn.execute(text(f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} {range_sql}"))
+                else:
+                    conn.execute(text(f"CREATE TABLE {name} PARTITION OF {PARENT_TABLE} {range_sql}"))
+        except DBAPIError as exc:
+            logger.warning("Could not create activity partition %s: %s", name, str(exc.orig).strip())
+            continue
+        created.append(name)
+    return created
+
+
+def condense_partition(conn: Connection, name: str, before: Optional[date] = None) -> None:
+    """Fold a partition's rows into per-day summary rows in user_activity_daily."""
+    where = "WHERE timestamp < :before " if before is not None else ""
+    conn.execute(text(
+        "INSERT INTO user_activity_daily (day, user_id, action, status, count) "
+        "SELECT CAST(timestamp AS DATE), user_id, action, status, SUM(hit_count) "
+        f"FROM {name} {where}GROUP BY 1, 2, 3, 4 "
+        "ON CONFLICT (day, user_id, action, status) "
+        "DO UPDATE SET count = user_activity_daily.count + EXCLUDED.count"
+    ), {"before": before})
+
+
+def apply_retention(conn: Connection, today: date, retention_days: int = ACTIVITY_RETENTION_DAYS) -> List[str]:
+    """Condense and drop every partition older than `retention_days`.
+
+    Each partition is summarised, detached and dropped in the caller's
+    transaction, so a failure never leaves it counted twice.
+    """
+    cutoff = today - timedelta(days=retention_days)
+    dropped = []
+    for day, name in sorted(list_partitions(conn).items()):
+        if day >= cutoff:
+            continue
+        condense_partition(conn, name)
+        conn.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+        conn.execute(text(f"DROP TABLE {name}"))
+        dropped.append(name)
+
+    # Rows that landed in the default partition age out row by row.
+    condense_partition(conn, DEFAULT_PARTITION, before=cutoff)
+    conn.execute(text(f"DELETE FROM {DEFAULT_PARTITION} WHERE timestamp < :before"), {"before": cutoff})
+    return dropped
+
+
+def _try_lock(conn: Connection) -> bool:
+    return bool(conn.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": MAINTENANCE_LOCK_KEY}).scalar())
+
+
+def run_partition_maintenance(today: Optional[date] = None) -> Dict:
+    """Create upcoming partitions and enforce the retention policies."""
+    today = today or datetime.utcnow().date()
+    created, dropped = [], []
+    with get_engine().begin() as conn:
+        if not _try_lock(conn):
+            return {"created": created, "dropped": dropped, "skipped": True}
+        created = ensure_partitions(conn, today)
+    if ACTIVITY_RETENTION_DAYS > 0:
+        with get_engine().begin() as conn:
+            if _try_lock(conn):
+                dropped = apply_retention(conn, today)
+    with get_engine().begin() as conn:
+        if _try_lock(conn):
+            prune_rollups(conn, datetime.utcnow())
+    return {"created": created, "dropped": dropped, "skipped": False}
+
+
+class PartitionMaintainer:
+    """Runs partition maintenance at startup and then every `interval` seconds."""
+
+    def __init__(self, interval: float = ACTIVITY_MAINTENANCE_INTERVAL) -> None:
+        self.interval = interval
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.last_run: Optional[Dict] = None
+        self.errors = 0
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="partition-maintenance", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while True:
+            try:
+                self.last_run = run_partition_maintenance()
+                if self.last_run["created"] or self.last_run["dropped"]:
+                    logger.info("Activity partition maintenance: %s", self.last_run)
+            except Exception:
+                self.errors += 1
+                logger.exception("Activity partition maintenance failed")
+            if self._stopping.wait(self.interval):
+                break
+
+    def stats(self) -> Dict:
+        return {
+            "enabled": ACTIVITY_PARTITION_MAINTENANCE,
+            "retention_days": ACTIVITY_RETENTION_DAYS,
+            "partitions_ahead": ACTIVITY_PARTITIONS_AHEAD,
+            "last_run": self.last_run,
+            "errors": self.errors,
+        }
+
+
+partition_maintainer = PartitionMaintainer()
@@ -0,0 +1,220 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import repeat
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import bcrypt
+from fastapi import HTTPException, status
+
+from middleware.metrics import phase
+
+# Password hashing pool configuration
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_EXECUTOR = os.getenv("PASSWORD_EXECUTOR", "thread")  # thread, process
+PASSWORD_WORKERS = int(os.getenv("PASSWORD_WORKERS", str(os.cpu_count() or 1)))
+PASSWORD_QUEUE_SIZE = int(os.getenv("PASSWORD_QUEUE_SIZE", "8"))
+PASSWORD_RETRY_AFTER = int(os.getenv("PASSWORD_RETRY_AFTER", "1"))
+
+
+def _timed(fn: Callable, *args) -> Tuple[object, float, float]:
+    """Run `fn` and report when it started (wall clock) and how long it took."""
+    started = time.time()
+    result = fn(*args)
+    return result, started, time.time() - started
+
+
+def _checkpw(plain_password: str, hashed_password: str) -> Tuple[object, float, float]:
+    return _timed(bcrypt.checkpw, plain_password.encode(), hashed_password.encode())
+
+
+def _bcrypt_hash(plain_password: str, rounds: int) -> str:
+    return bcrypt.hashpw(plain_password.encode(), bcrypt.gensalt(rounds)).decode()
+
+
+def _hashpw(plain_password: str, rounds: int) -> Tuple[object, float, float]:
+    return _timed(_bcrypt_hash, plain_password, rounds)
+
+
+class PasswordHasher:
+    """Runs bcrypt on a dedicated, separately sized executor.
+
+    At most `workers + queue_size` operations are admitted at once; anything
+    beyond that is rejected immediately with a 503 and a Retry-After header.
+    The sync routes wait for their result on a request thread, so admission
+    must stay well below the request threadpool (see `check_threadpool`).
+    """
+
+    def __init__(
+        self,
+        executor: str = PASSWORD_EXECUTOR,
+        workers: int = PASSWORD_WORKERS,
+        queue_size: int = PASSWORD_QUEUE_SIZE,
+        rounds: int = BCRYPT_ROUNDS,
+        retry_after: int = PASSWORD_RETRY_AFTER,
+    ) -> None:
+        if executor not in ("thread", "process"):
+            raise ValueError(f"Unknown password executor: {executor}")
+
+        self.executor_kind = executor
+        self.workers = workers
+        self.queue_size = queue_size
+        self.rounds = rounds
+        self.retry_after = retry_after
+
+        self._executor: Optional[Executor] = None
+        self._executor_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.capacity)
+        # Bulk hashes queued at once; interactive requests wait behind at most these.
+        self._bulk_slots = threading.BoundedSemaphore(workers)
+        self._metrics_lock = threading.Lock()
+
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.bulk_completed = 0
+        self.queue_seconds_total = 0.0
+        self.queue_seconds_max = 0.0
+        self.hash_seconds_total = 0.0
+        self.hash_seconds_max = 0.0
+
+    @property
+    def capacity(self) -> int:
+        return self.workers + self.queue_size
+
+    def check_threadpool(self, threads: int) -> None:
+        """Refuse to run with admission above half of `threads` request threads.
+
+        Every admitted verify or hash from a sync route holds a request thread
+        until bcrypt finishes; the other half is kept for everything else.
+        """
+        if self.capacity > threads // 2:
+            raise RuntimeError(
+                f"PASSWORD_WORKERS + PASSWORD_QUEUE_SIZE ({self.capacity}) must be at most half "
+                f"of the {threads} request threads; lower them or raise APP_REQUEST_THREADS"
+            )
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    if self.executor_kind == "process":
+                        self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                    else:
+                        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        return self._executor
+
+    def _submit(self, fn: Callable, *args) -> Future:
+        if not self._slots.acquire(blocking=False):
+            with self._metrics_lock:
+                self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Password service is busy, please retry",
+                headers={"Retry-After": str(self.retry_after)},
+            )
+        return self._start(fn, args)
+
+    def _start(self, fn: Callable, args: Tuple, bulk: bool = False) -> Future:
+        submitted = time.time()
+        with self._metrics_lock:
+            self.in_flight += 1
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except Exception:
+            self._release(bulk)
+            raise
+        future.add_done_callback(lambda done: self._record(done, submitted, bulk))
+        return future
+
+    def _release(self, bulk: bool = False) -> None:
+        with self._metrics_lock:
+            self.in_flight -= 1
+        self._slots.release()
+        if bulk:
+            self._bulk_slots.release()
+
+    def _record(self, future: Future, submitted: float, bulk: bool = False) -> None:
+        self._release(bulk)
+        if future.cancelled() or future.exception() is not None:
+            return
+        if bulk:
+            with self._metrics_lock:
+                self.bulk_completed += 1
+            return
+        _, started, duration = future.result()
+        waited = max(started - submitted, 0.0)
+        with self._metrics_lock:
+            self.completed += 1
+            self.queue_seconds_total += waited
+            self.queue_seconds_max = max(self.queue_seconds_max, waited)
+            self.hash_seconds_total += duration
+            self.hash_seconds_max = max(self.hash_seconds_max, duration)
+
+    def verify(self, plain_password: str, hashed_password: str) -> bool:
+        with phase("password_hash"):
+            return self._submit(_checkpw, plain_password, hashed_password).result()[0]
+
+    def hash(self, plain_password: str) -> str:
+        with phase("password_hash"):
+            return self._submit(_hashpw, plain_password, self.rounds).result()[0]
+
+    async def verify_async(self, plain_password: str, hashed_password: str) -> bool:
+        with phase("password_hash"):
+            result = await asyncio.wrap_future(self._submit(_checkpw, plain_password, hashed_password))
+        return result[0]
+
+    async def hash_async(self, plain_password: str) -> str:
+        with phase("password_hash"):
+            result = await asyncio.wrap_future(self._submit(_hashpw, plain_password, self.rounds))
+        return result[0]
+
+    def hash_many(self, plain_passwords: Sequence[str]) -> List[str]:
+        """Hash a batch of passwords across every worker, for bulk imports.
+
+        Each password takes an admission slot like an interactive request, but
+        waits for one instead of being turned away, and at most `workers` are
+        queued at a time. A signin arriving mid-import therefore waits behind
+        one bcrypt per worker, not behind the rest of the batch.
+        """
+        futures = []
+        for plain_password in plain_passwords:
+            self._bulk_slots.acquire()
+            self._slots.acquire()
+            futures.append(self._start(_hashpw, (plain_password, self.rounds), bulk=True))
+        return [future.result()[0] for future in futures]
+
+    def warm_up(self) -> None:
+        """Start every worker now rather than on the first signins.
+
+        Matters most for the process executor, whose workers are forked and
+        import bcrypt on first use.
+        """
+        list(self._get_executor().map(_bcrypt_hash, ["warm-up"] * self.workers, repeat(4)))
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def stats(self) -> Dict:
+        completed = self.completed
+        return {
+            "executor": self.executor_kind,
+            "workers": self.workers,
+            "capacity": self.capacity,
+            "rounds": self.rounds,
+            "in_flight": self.in_flight,
+            "completed": completed,
+            "rejected": self.rejected,
+            "bulk_completed": self.bulk_completed,
+            "queue_seconds_avg": self.queue_seconds_total / completed if completed else 0.0,
+            "queue_seconds_max": self.queue_seconds_max,
+            "hash_seconds_avg": self.hash_seconds_total / completed if completed else 0.0,
+            "hash_seconds_max": self.hash_seconds_max,
+        }
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,61 @@
+import json
+import os
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any
+from uuid import UUID
+
+from fastapi.responses import JSONResponse
+
+from middleware.metrics import phase
+
+# Render responses straight to bytes (with orjson when installed) instead of
+# FastAPI's response_model validation and jsonable_encoder pass; turn off to
+# validate every response against its model (slower than either).
+FAST_JSON = os.getenv("FAST_JSON", "true").lower() in ("1", "true", "yes")
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, (UUID, Decimal)):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Encode `content` as compact JSON, converting dates, datetimes and UUIDs."""
+    if FAST_JSON and orjson is not None:
+        return orjson.dumps(content, default=_default)
+    return json.dumps(
+        content,
+        default=_default,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse that also accepts dates, datetimes and UUIDs as-is."""
+
+    def render(self, content: Any) -> bytes:
+        with phase("serialization"):
+            return dumps(content)
+
+
+def render(content: Any) -> Any:
+    """Return `content` pre-rendered unless FAST_JSON is disabled.
+
+    A Response is passed through by FastAPI untouched, so the route's
+    `response_model` only documents the shape. Otherwise `content` is returned
+    as-is and FastAPI validates and encodes it as usual.
+    """
+    if FAST_JSON:
+        return FastJSONResponse(content)
+    return content
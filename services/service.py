@@ -1,9 +1,10 @@
-import bcrypt
 from datetime import datetime
-from typing import Dict
+from typing import Dict, Union
+from uuid import UUID
 
 from fastapi import HTTPException, status
-from sqlalchemy import text
+from sqlalchemy import select, text, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
 from models.user import User
@@ -11,22 +12,41 @@ from schemas.user import (
     UserChangePassword,
     UserCreate,
     UserProfileView,
+    UserSessionUpdate,
     UserSignIn,
     UserUpdate,
 )
+from services.password_hasher import password_hasher
+from services.session_token import SESSION_TOKEN_TTL, issue_session_token
+from services.user_cache import user_cache
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return bcrypt.checkpw(plain_password.encode(), hashed_password.encode())
+    return password_hasher.verify(plain_password, hashed_password)
 
 
 def hash_password(plain_password: str) -> str:
-    return bcrypt.hashpw(plain_password.encode(), bcrypt.gensalt()).decode()
+    return password_hasher.hash(plain_password)
 
 
-def _user_to_dict(user: User) -> Dict:
+# Columns behind every profile response; the password hash is only ever
+# selected for credential checks.
+_PROFILE_COLUMNS = (
+    User.id,
+    User.name,
+    User.email,
+    User.phone_number,
+    User.date_of_birth,
+    User.age,
+    User.blood_group,
+    User.session_version,
+)
+_CREDENTIAL_COLUMNS = _PROFILE_COLUMNS + (User.password,)
+
+
+def _user_to_dict(user) -> Dict:
     return {
-        "id": str(user.id),
+        "id": user.id,
         "name": user.name,
         "email": user.email,
         "phone_number": user.phone_number,
@@ -36,16 +56,145 @@ def _user_to_dict(user: User) -> Dict:
     }
 
 
-def signin_user(payload: UserSignIn, db: Session) -> Dict:
-    """Handle user signin logic: validate credentials and return user profile data."""
-    user = db.query(User).filter(User.email == payload.email).first()
-    if not user or not verify_password(payload.password, user.password):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid email or password",
+def _signin_response(user, issue_token: bool) -> Dict:
+    response = _user_to_dict(user)
+    if issue_token:
+        response["session_token"] = issue_session_token(str(user.id), user.session_version or 0)
+        response["expires_in"] = SESSION_TOKEN_TTL
+    return response
+
+
+def _invalid_credentials() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid email or password",
+    )
+
+
+def _credentials_query(email: str):
+    return select(*_CREDENTIAL_COLUMNS).where(User.email == email)
+
+
+def _session_profile_query(claims: Dict):
+    # Read from PostgreSQL rather than the user cache: a per-process cache may
+    # still hold the session_version from before another worker bumped it, and
+    # a bumped session_version revokes every token issued before it.
+    return select(*_PROFILE_COLUMNS).where(
+        User.id == UUID(claims["sub"]),
+        User.session_version == claims.get("ver"),
+    )
+
+
+def _invalidate(user) -> None:
+    user_cache.invalidate(emails=[user.email])
+
+
+def _signup_statement(payload: UserCreate, password_hash: str):
+    return (
+        insert(User)
+        .values(
+            name=payload.name,
+            email=payload.email,
+            password=password_hash,
+            phone_number=payload.phone_number,
+            date_of_birth=payload.date_of_birth,
+            age=payload.age,
+            blood_group=payload.blood_group,
         )
+        .on_conflict_do_nothing(index_elements=[User.email])
+        .returning(*_PROFILE_COLUMNS)
+    )
+
+
+def _profile_changes(payload: Union[UserUpdate, UserSessionUpdate]) -> Dict:
+    changes = {
+        field: getattr(payload, field)
+        for field in ("name", "phone_number", "date_of_birth", "age", "blood_group")
+        if getattr(payload, field) is not None
+    }
+    changes["updated_ts"] = datetime.utcnow()
+    return changes
+
+
+def _update_statement(values: Dict, *conditions):
+    return (
+        update(User)
+        .where(*conditions)
+        .values(**values)
+        .returning(*_PROFILE_COLUMNS)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _session_update_statement(payload: UserSessionUpdate, claims: Dict):
+    return _update_statement(
+        _profile_changes(payload),
+        User.id == UUID(claims["sub"]),
+        User.session_version == claims.get("ver"),
+    )
+
+
+def _profile_update_statement(payload: UserUpdate, user):
+    # Matching on the verified hash keeps a password changed since the
+    # verify from being bypassed.
+    return _update_statement(
+        _profile_changes(payload),
+        User.id == user.id,
+        User.password == user.password,
+    )
 
-    return _user_to_dict(user)
+
+def _password_change_statement(user, password_hash: str):
+    # Matching on the old hash makes concurrent password changes lose cleanly
+    # instead of overwriting each other.
+    return _update_statement(
+        {
+            "password": password_hash,
+            # Revoke every session token issued with the old password
+            "session_version": User.session_version + 1,
+            "updated_ts": datetime.utcnow(),
+        },
+        User.id == user.id,
+        User.password == user.password,
+    )
+
+
+def _session_revoked() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Session token revoked",
+    )
+
+
+def _email_taken() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Email already registered",
+    )
+
+
+def _load_user_by_email(db: Session, email: str):
+    found, user = user_cache.get_by_email(email)
+    if not found:
+        user = db.execute(_credentials_query(email)).first()
+        if user is None:
+            user_cache.put_missing(email)
+        else:
+            user_cache.put(user)
+    return user
+
+
+def _authenticate(db: Session, email: str, password: str):
+    user = _load_user_by_email(db, email)
+    if not user or not verify_password(password, user.password):
+        raise _invalid_credentials()
+    return user
+
+
+def signin_user(payload: UserSignIn, db: Session) -> Dict:
+    """Handle user signin logic: validate credentials and return user profile data."""
+    user = _authenticate(db, payload.email, payload.password)
+    return _signin_response(user, payload.issue_token)
 
 
 def health_check(db: Session) -> Dict:
@@ -61,84 +210,70 @@ def health_check(db: Session) -> Dict:
         )
 
 def signup_user(payload: UserCreate, db: Session) -> Dict:
-    """Handle user signup: ensure email is unique, hash password, create user."""
-    existing = db.query(User).filter(User.email == payload.email).first()
-    if existing:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered",
-        )
+    """Handle user signup: hash password and insert unless the email is taken."""
+    user = db.execute(_signup_statement(payload, hash_password(payload.password))).first()
+    if user is None:
+        db.rollback()
+        user_cache.invalidate(emails=[payload.email])
+        raise _email_taken()
 
-    user = User(
-        name=payload.name,
-        email=payload.email,
-        password=hash_password(payload.password),
-        phone_number=payload.phone_number,
-        date_of_birth=payload.date_of_birth,
-        age=payload.age,
-        blood_group=payload.blood_group,
-    )
-
-    db.add(user)
     db.commit()
-    db.refresh(user)
-
+    # Drop any cached "no such email" entry.
+    user_cache.invalidate(emails=[payload.email])
     return _user_to_dict(user)
 
 
 def update_user(payload: UserUpdate, db: Session) -> Dict:
     """Update basic profile fields for a user authenticated by email+password."""
-    user = db.query(User).filter(User.email == payload.email).first()
-    if not user or not verify_password(payload.password, user.password):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid email or password",
-        )
-
-    if payload.name is not None:
-        user.name = payload.name
-    if payload.phone_number is not None:
-        user.phone_number = payload.phone_number
-    if payload.date_of_birth is not None:
-        user.date_of_birth = payload.date_of_birth
-    if payload.age is not None:
-        user.age = payload.age
-    if payload.blood_group is not None:
-        user.blood_group = payload.blood_group
+    user = _authenticate(db, payload.email, payload.password)
 
-    user.updated_ts = datetime.utcnow()
+    updated = db.execute(_profile_update_statement(payload, user)).first()
+    _invalidate(user)
+    if updated is None:
+        db.rollback()
+        raise _invalid_credentials()
 
     db.commit()
-    db.refresh(user)
-
-    return _user_to_dict(user)
+    _invalidate(updated)
+    return _user_to_dict(updated)
 
 
 def change_password(payload: UserChangePassword, db: Session) -> Dict:
     """Change a user's password after verifying current password."""
-    user = db.query(User).filter(User.email == payload.email).first()
-    if not user or not verify_password(payload.current_password, user.password):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid email or password",
-        )
+    user = _authenticate(db, payload.email, payload.current_password)
 
-    user.password = hash_password(payload.new_password)
-    user.updated_ts = datetime.utcnow()
+    updated = db.execute(_password_change_statement(user, hash_password(payload.new_password))).first()
+    _invalidate(user)
+    if updated is None:
+        db.rollback()
+        raise _invalid_credentials()
 
     db.commit()
-    db.refresh(user)
-
-    return _user_to_dict(user)
+    _invalidate(updated)
+    return _user_to_dict(updated)
 
 
 def view_profile(payload: UserProfileView, db: Session) -> Dict:
     """Return a user's profile after verifying email+password."""
-    user = db.query(User).filter(User.email == payload.email).first()
-    if not user or not verify_password(payload.password, user.password):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid email or password",
-        )
+    user = _authenticate(db, payload.email, payload.password)
+    return _user_to_dict(user)
+
+
+def view_profile_by_session(claims: Dict, db: Session) -> Dict:
+    """Return the profile of the user holding a verified session token."""
+    user = db.execute(_session_profile_query(claims)).first()
+    if user is None:
+        raise _session_revoked()
+    return _user_to_dict(user)
+
 
+def update_user_by_session(payload: UserSessionUpdate, claims: Dict, db: Session) -> Dict:
+    """Update profile fields for the user holding a verified session token."""
+    user = db.execute(_session_update_statement(payload, claims)).first()
+    if user is None:
+        db.rollback()
+        raise _session_revoked()
+
+    db.commit()
+    _invalidate(user)
     return _user_to_dict(user)
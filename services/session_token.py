@@ -0,0 +1,78 @@
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import os
+import secrets
+import time
+from typing import Dict
+
+from fastapi import HTTPException, status
+
+logger = logging.getLogger(__name__)
+
+# Session token configuration
+SESSION_TOKEN_SECRET = os.getenv("SESSION_TOKEN_SECRET")
+SESSION_TOKEN_TTL = int(os.getenv("SESSION_TOKEN_TTL", "900"))
+
+if not SESSION_TOKEN_SECRET:
+    logger.warning(
+        "SESSION_TOKEN_SECRET is not set; using a per-process secret, so session "
+        "tokens are only valid in this process"
+    )
+    SESSION_TOKEN_SECRET = secrets.token_urlsafe(32)
+
+_SECRET = SESSION_TOKEN_SECRET.encode()
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _sign(body: str) -> str:
+    return _b64encode(hmac.new(_SECRET, body.encode(), hashlib.sha256).digest())
+
+
+def _invalid(detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detail,
+    )
+
+
+def issue_session_token(user_id: str, session_version: int, ttl: int = SESSION_TOKEN_TTL) -> str:
+    """Issue a compact `<claims>.<hmac>` token for a signed-in user.
+
+    `session_version` is bumped on password change, which revokes every token
+    issued before it.
+    """
+    claims = {"sub": user_id, "ver": session_version, "exp": int(time.time()) + ttl}
+    body = _b64encode(json.dumps(claims, separators=(",", ":")).encode())
+    return f"{body}.{_sign(body)}"
+
+
+def verify_session_token(token: str) -> Dict:
+    """Check the token's signature and expiry and return its claims."""
+    try:
+        body, signature = token.split(".")
+    except ValueError:
+        raise _invalid("Malformed session token")
+
+    # compare_digest only accepts ASCII str; headers may carry anything.
+    if not hmac.compare_digest(signature.encode(), _sign(body).encode()):
+        raise _invalid("Invalid session token")
+
+    try:
+        claims = json.loads(_b64decode(body))
+    except ValueError:
+        raise _invalid("Malformed session token")
+
+    if claims.get("exp", 0) <= time.time():
+        raise _invalid("Session token expired")
+
+    return claims
@@ -0,0 +1,253 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from types import SimpleNamespace
+from typing import Dict, Iterable, Optional, Tuple
+from uuid import UUID
+
+logger = logging.getLogger(__name__)
+
+# User record cache configuration
+USER_CACHE_BACKEND = os.getenv("USER_CACHE_BACKEND", "memory")  # memory, redis, none
+USER_CACHE_URL = os.getenv("USER_CACHE_URL", "redis://localhost:6379/0")
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "30"))
+USER_CACHE_NEGATIVE_TTL = float(os.getenv("USER_CACHE_NEGATIVE_TTL", "5"))
+
+# Stored in place of a record for emails that have no account.
+_MISSING = {"missing": True}
+
+
+class CacheBackend:
+    """Key/value store behind `UserCache`.
+
+    Values are JSON-compatible dicts. `remote` backends do network I/O, so
+    async callers run them off the event loop.
+    """
+
+    name = "none"
+    remote = False
+
+    def get(self, key: str) -> Optional[Dict]:
+        return None
+
+    def set(self, key: str, value: Dict, ttl: float) -> None:
+        pass
+
+    def delete(self, *keys: str) -> None:
+        pass
+
+    def size(self) -> Optional[int]:
+        return None
+
+
+class MemoryBackend(CacheBackend):
+    """Per-process LRU with a TTL on every entry."""
+
+    name = "memory"
+
+    def __init__(self, max_size: int = USER_CACHE_SIZE) -> None:
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Dict, ttl: float) -> None:
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, *keys: str) -> None:
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def size(self) -> Optional[int]:
+        return len(self._entries)
+
+
+class RedisBackend(CacheBackend):
+    """Shared cache on a Redis-protocol server, so every worker sees invalidations."""
+
+    name = "redis"
+    remote = True
+
+    def __init__(self, url: str = USER_CACHE_URL) -> None:
+        try:
+            import redis
+        except ImportError as exc:
+            raise RuntimeError("USER_CACHE_BACKEND=redis requires the redis package") from exc
+        self._client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+
+    def get(self, key: str) -> Optional[Dict]:
+        raw = self._client.get(key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value: Dict, ttl: float) -> None:
+        self._client.set(key, json.dumps(value), px=max(1, int(ttl * 1000)))
+
+    def delete(self, *keys: str) -> None:
+        if keys:
+            self._client.delete(*keys)
+
+
+def _create_backend(kind: str) -> CacheBackend:
+    if kind == "memory":
+        return MemoryBackend()
+    if kind == "redis":
+        return RedisBackend()
+    if kind == "none":
+        return CacheBackend()
+    raise ValueError(f"Unknown user cache backend: {kind}")
+
+
+def _email_key(email: str) -> str:
+    return f"user:email:{email}"
+
+
+class UserCache:
+    """Read-through cache of user records keyed by email.
+
+    Records hold the credential columns (including the password hash) so
+    signin and profile reads can be answered without PostgreSQL. Writers
+    invalidate the entry after committing; entries also expire after `ttl`
+    seconds. The per-process memory backend only sees its own process's
+    invalidations, so main.py refuses it for more than one worker. Unknown emails are cached for
+    `negative_ttl` seconds. Backend errors are logged and treated as misses.
+    """
+
+    def __init__(
+        self,
+        backend: CacheBackend,
+        ttl: float = USER_CACHE_TTL,
+        negative_ttl: float = USER_CACHE_NEGATIVE_TTL,
+    ) -> None:
+        self.backend = backend
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._metrics_lock = threading.Lock()
+
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    @property
+    def remote(self) -> bool:
+        return self.backend.remote
+
+    def _count(self, counter: str) -> None:
+        with self._metrics_lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _get(self, key: str) -> Optional[Dict]:
+        try:
+            return self.backend.get(key)
+        except Exception:
+            self._count("errors")
+            logger.warning("User cache read failed", exc_info=True)
+            return None
+
+    def _lookup(self, key: str) -> Tuple[bool, Optional[SimpleNamespace]]:
+        value = self._get(key)
+        if value is None:
+            self._count("misses")
+            return False, None
+        if value.get("missing"):
+            self._count("negative_hits")
+            return True, None
+        self._count("hits")
+        return True, _from_record(value)
+
+    def get_by_email(self, email: str) -> Tuple[bool, Optional[SimpleNamespace]]:
+        """Return `(found, user)`; `found` with no user is a cached "no such email"."""
+        return self._lookup(_email_key(email))
+
+    def put(self, user) -> None:
+        record = _to_record(user)
+        try:
+            self.backend.set(_email_key(user.email), record, self.ttl)
+        except Exception:
+            self._count("errors")
+            logger.warning("User cache write failed", exc_info=True)
+
+    def put_missing(self, email: str) -> None:
+        if self.negative_ttl <= 0:
+            return
+        try:
+            self.backend.set(_email_key(email), _MISSING, self.negative_ttl)
+        except Exception:
+            self._count("errors")
+            logger.warning("User cache write failed", exc_info=True)
+
+    def invalidate(self, emails: Iterable[str] = ()) -> None:
+        try:
+            self.backend.delete(*(_email_key(email) for email in emails))
+        except Exception:
+            self._count("errors")
+            logger.warning("User cache invalidation failed", exc_info=True)
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.negative_hits + self.misses
+        return {
+            "backend": self.backend.name,
+            "size": self.backend.size(),
+            "ttl": self.ttl,
+            "negative_ttl": self.negative_ttl,
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_ratio": (self.hits + self.negative_hits) / lookups if lookups else 0.0,
+        }
+
+
+_RECORD_FIELDS = (
+    "id",
+    "name",
+    "email",
+    "password",
+    "session_version",
+    "phone_number",
+    "date_of_birth",
+    "age",
+    "blood_group",
+)
+
+
+def _to_record(user) -> Dict:
+    record = {field: getattr(user, field) for field in _RECORD_FIELDS}
+    record["id"] = str(record["id"])
+    if record["date_of_birth"] is not None:
+        record["date_of_birth"] = record["date_of_birth"].isoformat()
+    return record
+
+
+def _from_record(record: Dict) -> SimpleNamespace:
+    user = SimpleNamespace(**record)
+    user.id = UUID(user.id)
+    if user.date_of_birth is not None:
+        user.date_of_birth = date.fromisoformat(user.date_of_birth)
+    return user
+
+
+user_cache = UserCache(_create_backend(USER_CACHE_BACKEND))